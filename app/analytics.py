@@ -0,0 +1,128 @@
+"""
+Инкрементальная агрегация дневной статистики товаров: python -m app.analytics
+
+Запускать по расписанию (например, каждые 5 минут). Каждый запуск:
+- добавляет новые отзывы (по id) к счётчикам дня написания отзыва;
+- вычитает отзывы, удалённые с прошлого запуска (по deactivated_at);
+- записывает текущий остаток активных товаров в строку сегодняшнего дня.
+"""
+import asyncio
+from datetime import date
+
+from sqlalchemy import select, func, or_
+
+from app.database import async_session_maker, async_engine, dialect_insert
+from app.models import Review as ReviewModel, Product as ProductModel, ProductDailyStats, AnalyticsWatermark
+
+CREATED = "reviews_created"
+DEACTIVATED = "reviews_deactivated"
+STOCK_BATCH_SIZE = 1000
+
+
+async def get_watermark(db, name: str) -> AnalyticsWatermark:
+    """
+    Возвращает водяной знак по имени, создавая его при первом запуске.
+    """
+    watermark = await db.get(AnalyticsWatermark, name)
+    if watermark is None:
+        watermark = AnalyticsWatermark(name=name, processed_id=0, snapshot_id=0)
+        db.add(watermark)
+        await db.flush()
+    return watermark
+
+
+def as_date(value) -> date:
+    # SQLite возвращает date() строкой
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+async def add_review_counts(db, condition, sign: int) -> int:
+    """
+    Прибавляет (sign=1) или вычитает (sign=-1) отзывы, подходящие под condition,
+    из счётчиков дня, в который они были написаны.
+    """
+    day = func.date(ReviewModel.comment_date)
+    result = await db.execute(
+        select(ReviewModel.product_id, ProductModel.seller_id, day,
+               func.count(ReviewModel.id), func.sum(ReviewModel.grade))
+        .join(ProductModel, ProductModel.id == ReviewModel.product_id)
+        .where(condition)
+        .group_by(ReviewModel.product_id, ProductModel.seller_id, day)
+    )
+    rows = [{"product_id": product_id, "seller_id": seller_id, "day": as_date(review_day),
+             "review_count": sign * count, "grade_sum": sign * grade_sum}
+            for product_id, seller_id, review_day, count, grade_sum in result.all()]
+    if rows:
+        stmt = dialect_insert(ProductDailyStats)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ProductDailyStats.product_id, ProductDailyStats.day],
+                set_={"review_count": ProductDailyStats.review_count + stmt.excluded.review_count,
+                      "grade_sum": ProductDailyStats.grade_sum + stmt.excluded.grade_sum},
+            ),
+            rows,
+        )
+    return len(rows)
+
+
+async def aggregate_reviews(db) -> None:
+    """
+    Обрабатывает новые и удалённые отзывы из окон между водяными знаками.
+    """
+    created = await get_watermark(db, CREATED)
+    deactivated = await get_watermark(db, DEACTIVATED)
+
+    # Отзывы, удалённые до появления deactivated_at, никогда не будут вычтены — не считаем их
+    await add_review_counts(
+        db,
+        (ReviewModel.id > created.processed_id) & (ReviewModel.id <= created.snapshot_id)
+        & or_(ReviewModel.is_active, ReviewModel.deactivated_at.is_not(None)),
+        1,
+    )
+    created.processed_id = created.snapshot_id
+    created.snapshot_id = await db.scalar(select(func.coalesce(func.max(ReviewModel.id), 0)))
+
+    if deactivated.snapshot_at is not None:
+        condition = ReviewModel.deactivated_at <= deactivated.snapshot_at
+        if deactivated.processed_at is not None:
+            condition &= ReviewModel.deactivated_at > deactivated.processed_at
+        await add_review_counts(db, ~ReviewModel.is_active & condition, -1)
+        deactivated.processed_at = deactivated.snapshot_at
+    deactivated.snapshot_at = await db.scalar(select(func.max(ReviewModel.deactivated_at))) or deactivated.processed_at
+
+
+async def snapshot_stock(db, today: date) -> None:
+    """
+    Записывает текущий остаток активных товаров в строку сегодняшнего дня.
+    """
+    result = await db.execute(
+        select(ProductModel.id, ProductModel.seller_id, ProductModel.stock).where(ProductModel.is_active == True)
+    )
+    stmt = dialect_insert(ProductDailyStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductDailyStats.product_id, ProductDailyStats.day],
+        set_={"stock": stmt.excluded.stock},
+    )
+    for batch in result.partitions(STOCK_BATCH_SIZE):
+        await db.execute(stmt, [{"product_id": product_id, "seller_id": seller_id, "day": today,
+                                 "review_count": 0, "grade_sum": 0, "stock": stock}
+                                for product_id, seller_id, stock in batch])
+
+
+async def run_aggregation() -> None:
+    """
+    Один запуск агрегации в одной транзакции: счётчики и водяные знаки меняются вместе.
+    """
+    async with async_session_maker() as db:
+        await aggregate_reviews(db)
+        await snapshot_stock(db, date.today())
+        await db.commit()
+
+
+async def main() -> None:
+    await run_aggregation()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
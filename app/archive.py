@@ -0,0 +1,248 @@
+"""
+Перенос давно удалённых (is_active = False) строк в архивные таблицы: python -m app.archive
+Восстановление: python -m app.archive restore product|category|review <id>
+
+Строки переносятся небольшими пачками, каждая в своей короткой транзакции, поэтому
+таблицы каталога не блокируются надолго. Порядок сохраняет внешние ключи:
+сначала отзывы, затем товары вместе со всеми их отзывами, затем категории без
+товаров и подкатегорий (листья раньше родителей).
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Table, select, insert, delete, literal, or_, exists, text, func
+
+from app.database import async_session_maker, async_engine
+from app.models import (Category as CategoryModel, Product as ProductModel, Review as ReviewModel,
+                        CategoryStats, ProductSimilarity,
+                        categories_archive, products_archive, reviews_archive)
+from app.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE
+
+SOURCE_TABLES = ("categories", "products", "reviews")
+
+
+async def move_rows(db, source: Table, target: Table, condition, now: datetime) -> int:
+    """
+    Копирует строки source, подходящие под condition, в target и удаляет их из source.
+    """
+    columns = [column.name for column in source.columns]
+    await db.execute(
+        insert(target).from_select(
+            columns + ["archived_at"],
+            select(*source.columns, literal(now, type_=target.c.archived_at.type)).where(condition),
+        )
+    )
+    result = await db.execute(delete(source).where(condition))
+    return result.rowcount
+
+
+def is_expired(model, cutoff: datetime):
+    """
+    Строка удалена раньше cutoff. Строки, удалённые до появления deactivated_at, считаются старыми.
+    """
+    return ~model.is_active & or_(model.deactivated_at.is_(None), model.deactivated_at < cutoff)
+
+
+async def archive_in_batches(select_ids, archive_batch) -> int:
+    """
+    Повторяет «выбрать пачку id → перенести» до тех пор, пока есть что переносить.
+    """
+    total = 0
+    while True:
+        async with async_session_maker() as db:
+            ids = (await db.scalars(select_ids.limit(ARCHIVE_BATCH_SIZE))).all()
+            if not ids:
+                return total
+            await archive_batch(db, ids)
+            await db.commit()
+        total += len(ids)
+        await asyncio.sleep(ARCHIVE_BATCH_PAUSE)
+
+
+async def archive_inactive(now: datetime | None = None) -> dict:
+    """
+    Архивирует отзывы, товары и категории, удалённые больше ARCHIVE_AFTER_DAYS дней назад.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=ARCHIVE_AFTER_DAYS)
+    reviews_table, products_table, categories_table = (
+        ReviewModel.__table__, ProductModel.__table__, CategoryModel.__table__)
+
+    async def archive_reviews(db, ids):
+        await move_rows(db, reviews_table, reviews_archive, ReviewModel.id.in_(ids), now)
+
+    async def archive_products(db, ids):
+        # Отзывы товара (в том числе активные) уходят в архив вместе с ним
+        await move_rows(db, reviews_table, reviews_archive, ReviewModel.product_id.in_(ids), now)
+        await db.execute(delete(ProductSimilarity).where(or_(ProductSimilarity.product_id.in_(ids),
+                                                             ProductSimilarity.similar_product_id.in_(ids))))
+        await move_rows(db, products_table, products_archive, ProductModel.id.in_(ids), now)
+
+    async def archive_categories(db, ids):
+        await db.execute(delete(CategoryStats).where(CategoryStats.category_id.in_(ids)))
+        await move_rows(db, categories_table, categories_archive, CategoryModel.id.in_(ids), now)
+
+    child = CategoryModel.__table__.alias("child")
+    return {
+        "reviews": await archive_in_batches(
+            select(ReviewModel.id).where(is_expired(ReviewModel, cutoff)), archive_reviews),
+        "products": await archive_in_batches(
+            select(ProductModel.id).where(is_expired(ProductModel, cutoff)), archive_products),
+        "categories": await archive_in_batches(
+            select(CategoryModel.id).where(
+                is_expired(CategoryModel, cutoff),
+                ~exists().where(ProductModel.category_id == CategoryModel.id),
+                ~exists().where(child.c.parent_id == CategoryModel.id),
+            ),
+            archive_categories),
+    }
+
+
+async def restore_rows(db, source: Table, target: Table, condition) -> int:
+    """
+    Возвращает строки из архива target в рабочую таблицу source.
+    """
+    columns = [column.name for column in source.columns]
+    await db.execute(
+        insert(source).from_select(columns, select(*[target.c[name] for name in columns]).where(condition))
+    )
+    result = await db.execute(delete(target).where(condition))
+    return result.rowcount
+
+
+async def restore_category(db, category_id: int) -> bool:
+    """
+    Восстанавливает категорию из архива вместе с архивными предками.
+    Возвращает False, если категории в архиве нет.
+    """
+    parent_id = await db.scalar(select(categories_archive.c.parent_id)
+                                .where(categories_archive.c.id == category_id))
+    if parent_id is not None and await db.get(CategoryModel, parent_id) is None:
+        await restore_category(db, parent_id)
+    if not await restore_rows(db, CategoryModel.__table__, categories_archive, categories_archive.c.id == category_id):
+        return False
+    db.add(CategoryStats(category_id=category_id))
+    await db.flush()
+    return True
+
+
+async def restore_product(db, product_id: int) -> bool:
+    """
+    Восстанавливает товар из архива вместе с его категорией и отзывами.
+    Возвращает False, если товара в архиве нет.
+    """
+    category_id = await db.scalar(select(products_archive.c.category_id)
+                                  .where(products_archive.c.id == product_id))
+    if category_id is None:
+        return False
+    if await db.get(CategoryModel, category_id) is None:
+        await restore_category(db, category_id)
+    await restore_rows(db, ProductModel.__table__, products_archive, products_archive.c.id == product_id)
+    await restore_rows(db, ReviewModel.__table__, reviews_archive, reviews_archive.c.product_id == product_id)
+    return True
+
+
+async def restore_review(db, review_id: int) -> bool:
+    """
+    Восстанавливает отзыв из архива вместе с его товаром.
+    Возвращает False, если отзыва в архиве нет.
+    """
+    product_id = await db.scalar(select(reviews_archive.c.product_id).where(reviews_archive.c.id == review_id))
+    if product_id is None:
+        return False
+    if await db.get(ProductModel, product_id) is None:
+        await restore_product(db, product_id)
+    await restore_rows(db, ReviewModel.__table__, reviews_archive, reviews_archive.c.id == review_id)
+    return True
+
+
+async def table_sizes() -> dict:
+    """
+    Размер таблиц с индексами в байтах. В SQLite — размер всей базы без свободных страниц.
+    """
+    async with async_engine.connect() as conn:
+        if async_engine.dialect.name == "postgresql":
+            return {table: await conn.scalar(text("SELECT pg_total_relation_size(:table)"), {"table": table})
+                    for table in SOURCE_TABLES}
+        page_size = await conn.scalar(text("PRAGMA page_size"))
+        used_pages = await conn.scalar(text("PRAGMA page_count")) - await conn.scalar(text("PRAGMA freelist_count"))
+        return {"database": page_size * used_pages}
+
+
+async def vacuum() -> None:
+    """
+    Делает освободившееся место доступным для повторного использования и обновляет статистику.
+    """
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if async_engine.dialect.name == "postgresql":
+            for table in SOURCE_TABLES:
+                await conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+        else:
+            await conn.execute(text("VACUUM"))
+
+
+async def query_timings(repeat: int = 20) -> dict:
+    """
+    Среднее время (мс) типичных запросов роутеров по активным строкам.
+    """
+    queries = {
+        "active_products": select(ProductModel).where(ProductModel.is_active == True),
+        "active_categories": select(CategoryModel).where(CategoryModel.is_active == True),
+        "active_reviews": select(ReviewModel).where(ReviewModel.is_active),
+        "review_count": select(func.count(ReviewModel.id)),
+    }
+    timings = {}
+    async with async_session_maker() as db:
+        for name, stmt in queries.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                (await db.execute(stmt)).all()
+            timings[name] = round((time.perf_counter() - start) / repeat * 1000, 3)
+    return timings
+
+
+RESTORERS = {"category": restore_category, "product": restore_product, "review": restore_review}
+
+
+async def restore(kind: str, object_id: int) -> int:
+    async with async_session_maker() as db:
+        restored = await RESTORERS[kind](db, object_id)
+        await db.commit()
+    if not restored:
+        print(f"В архиве нет: {kind} {object_id}", file=sys.stderr)
+        return 1
+    print(f"Восстановлено: {kind} {object_id}")
+    return 0
+
+
+async def archive() -> int:
+    sizes_before, timings_before = await table_sizes(), await query_timings()
+    moved = await archive_inactive()
+    await vacuum()
+    sizes_after, timings_after = await table_sizes(), await query_timings()
+    print(f"Перенесено в архив: {moved}")
+    for name in sizes_before:
+        print(f"{name}: {sizes_before[name]} -> {sizes_after[name]} байт "
+              f"(разница {sizes_before[name] - sizes_after[name]})")
+    for name in timings_before:
+        print(f"{name}: {timings_before[name]} -> {timings_after[name]} мс")
+    return 0
+
+
+async def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "restore":
+        if len(sys.argv) != 4 or sys.argv[2] not in RESTORERS or not sys.argv[3].isdigit():
+            print(f"Использование: python -m app.archive restore {'|'.join(RESTORERS)} <id>", file=sys.stderr)
+            return 2
+        code = await restore(sys.argv[2], int(sys.argv[3]))
+    else:
+        code = await archive()
+    await async_engine.dispose()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,14 +1,20 @@
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+import hashlib
+import time
+import uuid
 import jwt
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
 
 from app.models.users import User as UserModel
-from app.config import SECRET_KEY, ALGORITHM
+from app.models.revoked_tokens import RevokedToken
+from app.config import SECRET_KEY, ALGORITHM, JWT_KEYS, JWT_ACTIVE_KID, TOKEN_CACHE_SIZE
 from app.db_depends import get_async_db
+from app.database import dialect_insert
 
 
 # Создаём контекст для хеширования с использованием bcrypt
@@ -19,6 +25,41 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 
+
+class TokenCache:
+    """
+    Ограниченный LRU-кэш уже проверенных токенов: ключ — sha256 токена, значение — payload.
+    Запись с истёкшим exp считается промахом, и токен заново проходит jwt.decode.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[bytes, dict] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        payload = self._items.get(key)
+        if payload is None:
+            return None
+        if payload["exp"] <= time.time():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return payload
+
+    def set(self, token: str, payload: dict) -> None:
+        self._items[self._key(token)] = payload
+        self._items.move_to_end(self._key(token))
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
 def hash_password(password: str) -> str:
     """
     Преобразует пароль в хеш с использованием bcrypt.
@@ -32,24 +73,74 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+def encode_token(payload: dict) -> str:
+    """
+    Подписывает токен активным ключом; kid в заголовке указывает, каким ключом проверять.
+    """
+    if JWT_ACTIVE_KID is None:
+        return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(payload, JWT_KEYS[JWT_ACTIVE_KID], algorithm=ALGORITHM,
+                      headers={"kid": JWT_ACTIVE_KID})
+
+
+def decode_token(token: str) -> dict:
+    """
+    Проверяет подпись и срок токена. Повторные проверки того же токена берутся из кэша.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = JWT_KEYS.get(kid) if kid is not None else SECRET_KEY
+    if key is None:
+        raise jwt.InvalidTokenError("Unknown signing key")
+    payload = jwt.decode(token, key, algorithms=[ALGORITHM])
+    token_cache.set(token, payload)
+    return payload
+
+
+def token_type(payload: dict) -> str:
+    """
+    Тип токена: "access" или "refresh". У токенов, выданных до появления claim type,
+    refresh отличается наличием jti.
+    """
+    return payload.get("type") or ("refresh" if "jti" in payload else "access")
+
+
 def create_refresh_token(data: dict):          # New
     """
-    Создаёт рефреш-токен с длительным сроком действия.
+    Создаёт рефреш-токен с длительным сроком действия и уникальным jti для отзыва.
     """
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "refresh"})
+    return encode_token(to_encode)
 
 
 def create_access_token(data: dict):
     """
-    Создаёт JWT с payload (sub, role, id, exp).
+    Создаёт JWT с payload (sub, role, id, exp, type).
     """
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "type": "access"})
+    return encode_token(to_encode)
+
+
+async def revoke_refresh_token(db: AsyncSession, payload: dict) -> bool:
+    """
+    Отзывает refresh-токен по jti. Возвращает False, если токен уже был отозван.
+    Заодно удаляет записи о токенах, срок которых всё равно истёк.
+    """
+    now = datetime.now(timezone.utc)
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+    stmt = (
+        dialect_insert(RevokedToken)
+        .values(jti=payload["jti"], expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc))
+        .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        .returning(RevokedToken.jti)
+    )
+    return await db.scalar(stmt) is not None
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme),
@@ -63,9 +154,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
-        if email is None:
+        # Refresh-токен не даёт доступа к API, иначе отзыв при logout его не ограничивал бы
+        if email is None or token_type(payload) != "access":
             raise credentials_exception
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -0,0 +1,92 @@
+"""
+Замер сжатия ответов: python -m app.bench_compression
+
+Во временной базе SQLite создаётся BENCH_CATEGORIES категорий со статистикой и BENCH_PRODUCTS
+товаров. Приложение вызывается в том же процессе через ASGI, без сети. Для каждого пути из
+BENCH_PATHS и каждой кодировки (identity и доступные из COMPRESSORS) выполняется BENCH_REPEAT
+запросов. Печатаются байты на проводе и процессорное время на запрос (мс, медиана). Прирост CPU
+считается относительно identity. Для кэшируемых путей (CACHEABLE_PATHS) повторные запросы
+берут готовое тело из кэша; это и есть рабочий режим таких маршрутов.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ["DB_ECHO"] = "false"
+
+import asyncio
+import statistics
+import time
+
+import httpx
+from sqlalchemy import insert
+
+from app.compression import COMPRESSORS
+from app.database import async_engine, async_session_maker, create_sqlite_tables
+from app.main import app
+from app.models import Category, CategoryStats, Product, User
+
+PRODUCTS = int(os.getenv("BENCH_PRODUCTS", "2000"))
+CATEGORIES = int(os.getenv("BENCH_CATEGORIES", "200"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "50"))
+PATHS = os.getenv("BENCH_PATHS", "/products/,/categories/,/categories/stats").split(",")
+ENCODINGS = ["identity", *COMPRESSORS]
+
+
+async def seed() -> None:
+    async with async_session_maker() as db:
+        db.add(User(email="bench@example.com", hashed_password="-", role="seller"))
+        await db.execute(insert(Category), [
+            {"name": f"Категория {number}"} for number in range(CATEGORIES)
+        ])
+        await db.execute(insert(CategoryStats), [
+            {"category_id": number + 1, "product_count": PRODUCTS // CATEGORIES,
+             "total_product_count": PRODUCTS // CATEGORIES, "min_price": 0.99, "max_price": 999.99,
+             "avg_rating": 3.5, "rating_sum": 0.0, "rated_count": 0}
+            for number in range(CATEGORIES)
+        ])
+        await db.execute(insert(Product), [
+            {"name": f"Product {number}", "description": "Описание товара " * 10, "price": number % 1000 + 0.99,
+             "stock": number % 50, "category_id": number % CATEGORIES + 1, "seller_id": 1,
+             "rating": (number % 50) / 10}
+            for number in range(PRODUCTS)
+        ])
+        await db.commit()
+
+
+async def measure(client: httpx.AsyncClient, path: str, encoding: str) -> tuple[int, float]:
+    """
+    Возвращает (байт на проводе, медиана CPU на запрос в мс).
+    """
+    headers = {"Accept-Encoding": encoding}
+    await client.get(path, headers=headers)  # прогрев кэшей запроса и соединения
+    timings = []
+    wire_bytes = 0
+    for _ in range(REPEAT):
+        start = time.process_time()
+        response = await client.get(path, headers=headers)
+        timings.append((time.process_time() - start) * 1000)
+        response.raise_for_status()
+        wire_bytes = response.num_bytes_downloaded
+    return wire_bytes, statistics.median(timings)
+
+
+async def main() -> None:
+    await create_sqlite_tables()
+    await seed()
+    print(f"{PRODUCTS} товаров, {CATEGORIES} категорий, {REPEAT} повторов")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in PATHS:
+            baseline_bytes, baseline_cpu = await measure(client, path, "identity")
+            print(f"{path}: identity {baseline_bytes} байт, CPU {baseline_cpu:.2f} мс")
+            for encoding in ENCODINGS[1:]:
+                wire_bytes, cpu = await measure(client, path, encoding)
+                print(f"{path}: {encoding} {wire_bytes} байт ({wire_bytes / baseline_bytes:.1%}), "
+                      f"CPU {cpu:.2f} мс ({cpu - baseline_cpu:+.2f} мс)")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
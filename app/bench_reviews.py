@@ -0,0 +1,193 @@
+"""
+Замер секционирования отзывов: BENCH_DATABASE_URL=postgresql+asyncpg://... python -m app.bench_reviews
+
+Таблицы создаются в отдельной схеме bench_reviews и удаляются после замера. Сравниваются три
+варианта reviews: как до миграции 3c8d41f2a9e7, он же с индексом по product_id (чтобы отделить
+эффект секционирования от эффекта индекса) и секционированный по хешу product_id, как после неё.
+Для каждого варианта:
+
+- заливается BENCH_ROWS отзывов на BENCH_PRODUCTS товаров;
+- BENCH_DURATION секунд из BENCH_CONCURRENCY соединений вставляются отзывы по одному тем же
+  INSERT ... ON CONFLICT, что в create_review, — вставок в секунду;
+- выполняется запрос get_product_reviews для случайных товаров (до BENCH_QUERIES запросов
+  или BENCH_QUERY_SECONDS секунд) — p50/p95/p99 в мс.
+"""
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "postgresql+asyncpg://postgres@localhost:5432/postgres")
+ROWS = int(os.getenv("BENCH_ROWS", "20000000"))
+PRODUCTS = int(os.getenv("BENCH_PRODUCTS", "100000"))
+PARTITIONS = int(os.getenv("BENCH_PARTITIONS", "16"))  # как в миграции 3c8d41f2a9e7
+DURATION = float(os.getenv("BENCH_DURATION", "30"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "16"))
+QUERIES = int(os.getenv("BENCH_QUERIES", "1000"))
+QUERY_SECONDS = float(os.getenv("BENCH_QUERY_SECONDS", "30"))
+LOAD_CHUNK = 1_000_000
+NEW_USERS = 1_000_000
+SCHEMA = "bench_reviews"
+
+# Пары (пользователь, товар) при заливке не повторяются: строка i — пользователь i // PRODUCTS
+EXISTING_USERS = -(-ROWS // PRODUCTS)
+
+REVIEWS_DDL = """
+CREATE TABLE reviews (
+    id integer NOT NULL DEFAULT nextval('reviews_id_seq'),
+    user_id integer NOT NULL REFERENCES users (id),
+    product_id integer NOT NULL REFERENCES products (id),
+    comment text,
+    comment_date timestamp NOT NULL DEFAULT now(),
+    grade integer NOT NULL,
+    is_active boolean NOT NULL,
+    deactivated_at timestamptz,
+    PRIMARY KEY ({primary_key})
+) {partition_by}
+"""
+
+INSERT_REVIEW = text(
+    "INSERT INTO reviews (user_id, product_id, grade, is_active) VALUES (:user_id, :product_id, :grade, true) "
+    "ON CONFLICT (user_id, product_id) WHERE is_active DO NOTHING RETURNING id"
+)
+
+# Тот же запрос, что строит get_product_reviews
+PRODUCT_REVIEWS = text(
+    "SELECT id, user_id, product_id, comment, comment_date, grade, is_active "
+    "FROM reviews WHERE product_id = :product_id AND is_active"
+)
+
+
+async def create_base_tables(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text("CREATE TABLE products (id integer PRIMARY KEY)"))
+        await conn.execute(text("CREATE TABLE users (id integer PRIMARY KEY)"))
+        await conn.execute(text("INSERT INTO products SELECT generate_series(1, CAST(:n AS integer))"),
+                           {"n": PRODUCTS})
+        await conn.execute(text("INSERT INTO users SELECT generate_series(1, CAST(:n AS integer))"),
+                           {"n": EXISTING_USERS + NEW_USERS})
+
+
+async def create_reviews(engine, partitioned: bool) -> float:
+    """
+    Создаёт и заполняет reviews; индексы строятся после заливки, как в миграции. Возвращает строк в секунду.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS reviews"))
+        await conn.execute(text("DROP SEQUENCE IF EXISTS reviews_id_seq"))
+        await conn.execute(text("CREATE SEQUENCE reviews_id_seq"))
+        await conn.execute(text(REVIEWS_DDL.format(
+            primary_key="product_id, id" if partitioned else "id",
+            partition_by="PARTITION BY HASH (product_id)" if partitioned else "",
+        )))
+        if partitioned:
+            for remainder in range(PARTITIONS):
+                await conn.execute(text(f"CREATE TABLE reviews_p{remainder:02d} PARTITION OF reviews "
+                                        f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"))
+    start = time.perf_counter()
+    for offset in range(0, ROWS, LOAD_CHUNK):
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("INSERT INTO reviews (user_id, product_id, comment, grade, is_active) "
+                     "SELECT i / CAST(:products AS integer) + 1, i % CAST(:products AS integer) + 1, "
+                     "'Отзыв ' || i, 1 + i % 5, true "
+                     "FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS i"),
+                {"products": PRODUCTS, "first": offset, "last": min(offset + LOAD_CHUNK, ROWS) - 1},
+            )
+    load_seconds = time.perf_counter() - start
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE UNIQUE INDEX uq_reviews_user_product_active ON reviews "
+                                "(user_id, product_id) WHERE is_active"))
+        await conn.execute(text("CREATE INDEX ix_reviews_id ON reviews (id)"))
+    await analyze(engine)
+    return ROWS / load_seconds
+
+
+async def analyze(engine) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE reviews"))
+
+
+async def insert_throughput(engine) -> float:
+    """
+    Одиночные вставки отзывов новыми пользователями из CONCURRENCY соединений; вставок в секунду.
+    """
+    deadline = time.monotonic() + DURATION
+    users = iter(random.sample(range(EXISTING_USERS + 1, EXISTING_USERS + NEW_USERS + 1), NEW_USERS))
+    inserted = 0
+
+    async def worker():
+        nonlocal inserted
+        while time.monotonic() < deadline:
+            async with engine.begin() as conn:
+                review_id = await conn.scalar(INSERT_REVIEW, {"user_id": next(users),
+                                                              "product_id": random.randint(1, PRODUCTS),
+                                                              "grade": random.randint(1, 5)})
+            inserted += review_id is not None
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(CONCURRENCY)])
+    return inserted / (time.perf_counter() - start)
+
+
+async def query_latency(engine) -> dict:
+    """
+    Задержка запроса отзывов товара в одном соединении, мс.
+    """
+    timings = []
+    async with engine.connect() as conn:
+        for _ in range(5):
+            (await conn.execute(PRODUCT_REVIEWS, {"product_id": random.randint(1, PRODUCTS)})).all()
+        deadline = time.monotonic() + QUERY_SECONDS
+        while len(timings) < QUERIES and time.monotonic() < deadline:
+            start = time.perf_counter()
+            (await conn.execute(PRODUCT_REVIEWS, {"product_id": random.randint(1, PRODUCTS)})).all()
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "queries": len(timings),
+        "p50": statistics.median(timings),
+        "p95": timings[int(len(timings) * 0.95)],
+        "p99": timings[int(len(timings) * 0.99)],
+    }
+
+
+async def measure(engine, name: str, load_rate: float | None = None) -> None:
+    latency = await query_latency(engine)
+    inserts = await insert_throughput(engine)
+    print(f"{name}: заливка {f'{load_rate:.0f} строк/с' if load_rate else '—'}, вставки {inserts:.0f}/с, "
+          f"get_product_reviews p50 {latency['p50']:.2f} мс, p95 {latency['p95']:.2f} мс, "
+          f"p99 {latency['p99']:.2f} мс ({latency['queries']} запросов)", flush=True)
+
+
+async def main() -> None:
+    engine = create_async_engine(DATABASE_URL, pool_size=CONCURRENCY, max_overflow=0,
+                                 connect_args={"server_settings": {"search_path": SCHEMA}})
+    print(f"{ROWS} отзывов, {PRODUCTS} товаров, {PARTITIONS} секций, "
+          f"{CONCURRENCY} соединений на вставку, {DURATION:.0f} с", flush=True)
+    try:
+        await create_base_tables(engine)
+        load_rate = await create_reviews(engine, partitioned=False)
+        await measure(engine, "без секций", load_rate)
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE INDEX ix_reviews_product_id ON reviews (product_id)"))
+        await analyze(engine)
+        await measure(engine, "без секций + индекс product_id")
+        load_rate = await create_reviews(engine, partitioned=True)
+        await measure(engine, "секционированная", load_rate)
+    finally:
+        if os.getenv("BENCH_KEEP", "false").lower() != "true":
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
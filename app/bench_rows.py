@@ -0,0 +1,92 @@
+"""
+Замер загрузки списков через ORM и через row_type: python -m app.bench_rows
+
+Во временной базе SQLite создаётся BENCH_PRODUCTS товаров, затем запрос активных товаров
+(как в get_products) выполняется BENCH_REPEAT раз двумя способами: select(Product) с ORM-объектами
+и select(*ProductRow.columns). В обоих случаях строки проходят валидацию схемой ответа.
+Печатает задержку (медиана и минимум, мс) и пик выделенной памяти за один запрос по tracemalloc.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ["DB_ECHO"] = "false"
+
+import asyncio
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from app.database import async_engine, async_session_maker, create_sqlite_tables
+from app.models import Category, Product, User
+from app.models.products import ProductRow
+from app.schemas import Product as ProductSchema
+
+PRODUCTS = int(os.getenv("BENCH_PRODUCTS", "20000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "10"))
+
+products_adapter = TypeAdapter(List[ProductSchema])
+
+
+async def seed() -> None:
+    async with async_session_maker() as db:
+        db.add(User(email="bench@example.com", hashed_password="-", role="seller"))
+        db.add(Category(name="Bench"))
+        await db.flush()
+        await db.execute(insert(Product), [
+            {"name": f"Product {number}", "description": "Описание товара " * 10, "price": number % 1000 + 0.99,
+             "stock": number % 50, "category_id": 1, "seller_id": 1, "rating": (number % 50) / 10}
+            for number in range(PRODUCTS)
+        ])
+        await db.commit()
+
+
+async def load_orm() -> list:
+    async with async_session_maker() as db:
+        products = (await db.scalars(select(Product).where(Product.is_active == True))).all()
+        return products_adapter.validate_python(products, from_attributes=True)
+
+
+async def load_rows() -> list:
+    async with async_session_maker() as db:
+        products = ProductRow.from_result(await db.execute(select(*ProductRow.columns)
+                                                           .where(Product.is_active == True)))
+        return products_adapter.validate_python(products, from_attributes=True)
+
+
+async def measure(name: str, load) -> None:
+    await load()  # прогрев кэшей запроса и соединения
+    timings = []
+    for _ in range(REPEAT):
+        gc.collect()
+        start = time.perf_counter()
+        await load()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    await load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name}: медиана {statistics.median(timings):.0f} мс, минимум {min(timings):.0f} мс, "
+          f"пик памяти {peak / 1024 / 1024:.1f} МБ")
+
+
+async def main() -> None:
+    await create_sqlite_tables()
+    await seed()
+    print(f"{PRODUCTS} товаров, {REPEAT} повторов")
+    await measure("ORM select(Product)", load_orm)
+    await measure("row_type ProductRow", load_rows)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
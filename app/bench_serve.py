@@ -0,0 +1,108 @@
+"""
+Нагрузочный замер масштабирования по ядрам: python -m app.bench_serve
+
+Для каждого WEB_WORKERS из BENCH_WORKERS (по умолчанию 1,2,4) поднимает python -m app.serve
+на SQLite, заполняет каталог и BENCH_DURATION секунд шлёт GET BENCH_PATH из нескольких
+клиентских процессов (генератор нагрузки сам не должен упираться в одно ядро). Печатает req/s.
+"""
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+WORKERS = [int(item) for item in os.getenv("BENCH_WORKERS", "1,2,4").split(",")]
+DURATION = float(os.getenv("BENCH_DURATION", "10"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "64"))
+CLIENT_PROCESSES = int(os.getenv("BENCH_CLIENT_PROCESSES", "4"))
+BENCH_PATH = os.getenv("BENCH_PATH", "/categories/")
+PORT = int(os.getenv("BENCH_PORT", "8765"))
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+async def client_loop(concurrency: int, deadline: float) -> tuple[int, int]:
+    """
+    Держит concurrency одновременных запросов до deadline; возвращает (успешные, ошибки).
+    """
+    ok = errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal ok, errors
+            while time.monotonic() < deadline:
+                try:
+                    response = await client.get(BENCH_PATH)
+                    if response.status_code == 200:
+                        ok += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return ok, errors
+
+
+def client_process(args: tuple[int, float]) -> tuple[int, int]:
+    return asyncio.run(client_loop(*args))
+
+
+def wait_ready(timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{BASE_URL}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("сервер не поднялся")
+
+
+def seed() -> None:
+    with httpx.Client(base_url=BASE_URL) as client:
+        for number in range(20):
+            client.post("/categories/", json={"name": f"Category {number}"})
+
+
+def run(workers: int, env: dict) -> float:
+    server = subprocess.Popen([sys.executable, "-m", "app.serve"], env={**env, "WEB_WORKERS": str(workers)},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready()
+        seed()
+        # Короткий прогон, чтобы все воркеры открыли соединения до замера
+        client_process((8, time.monotonic() + 1))
+        deadline = time.monotonic() + DURATION
+        per_process = max(1, CONCURRENCY // CLIENT_PROCESSES)
+        with multiprocessing.Pool(CLIENT_PROCESSES) as pool:
+            results = pool.map(client_process, [(per_process, deadline)] * CLIENT_PROCESSES)
+        ok, errors = map(sum, zip(*results))
+        rate = ok / DURATION
+        print(f"WEB_WORKERS={workers}: {rate:.0f} req/s ({ok} ok, {errors} ошибок)", flush=True)
+        return rate
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    print(f"{BENCH_PATH}, {DURATION:.0f} с, {CONCURRENCY} одновременных запросов, "
+          f"{CLIENT_PROCESSES} клиентских процессов, ядер: {os.cpu_count()}")
+    rates = {}
+    for workers in WORKERS:
+        env = {**os.environ, "DB_BACKEND": "sqlite", "PORT": str(PORT), "DB_ECHO": "false",
+               "SQLITE_PATH": os.path.join(tempfile.mkdtemp(), "bench.db")}
+        env.setdefault("SECRET_KEY", "bench-secret-key-for-hs256-signing-0123")
+        rates[workers] = run(workers, env)
+    base = rates[WORKERS[0]]
+    for workers, rate in rates.items():
+        print(f"WEB_WORKERS={workers}: x{rate / base:.2f} относительно WEB_WORKERS={WORKERS[0]}")
+
+
+if __name__ == "__main__":
+    main()
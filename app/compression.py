@@ -0,0 +1,159 @@
+"""
+Сжатие ответов с согласованием по Accept-Encoding: zstd и br, если установлены
+пакеты zstandard и brotli, иначе gzip.
+
+Большие тела сжимаются в пуле потоков, чтобы не занимать event loop. Для кэшируемых
+маршрутов (CACHEABLE_PATHS) сжатое тело запоминается по хешу исходного: одинаковый
+ответ не сжимается повторно, а изменившийся сразу даёт новый ключ.
+"""
+import asyncio
+import gzip
+import hashlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import COMPRESSION_MIN_SIZE, COMPRESSION_OFFLOAD_SIZE, COMPRESSION_CACHE_SIZE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def compress_gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=5)
+
+
+COMPRESSORS = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+if brotli is not None:
+    COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=4)
+COMPRESSORS["gzip"] = compress_gzip
+
+# Ответы, которые отдаются многим клиентам одинаковыми
+CACHEABLE_PATHS = {"/categories/", "/categories/stats"}
+
+# Уже сжатые или потоковые ответы не трогаем
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    Выбирает кодировку с наибольшим q; при равенстве — в порядке предпочтения сервера (zstd, br, gzip).
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in COMPRESSORS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressedBodyCache:
+    """
+    LRU-кэш сжатых тел: ключ — (кодировка, хеш исходного тела).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+
+    def get(self, key: tuple[str, bytes]) -> bytes | None:
+        body = self._items.get(key)
+        if body is not None:
+            self._items.move_to_end(key)
+        return body
+
+    def set(self, key: tuple[str, bytes], body: bytes) -> None:
+        self._items[key] = body
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+
+compressed_cache = CompressedBodyCache(COMPRESSION_CACHE_SIZE)
+
+
+async def compress(encoding: str, data: bytes, cacheable: bool) -> bytes:
+    key = (encoding, hashlib.sha1(data, usedforsecurity=False).digest()) if cacheable else None
+    if key is not None:
+        cached = compressed_cache.get(key)
+        if cached is not None:
+            return cached
+    if len(data) >= COMPRESSION_OFFLOAD_SIZE:
+        body = await asyncio.to_thread(COMPRESSORS[encoding], data)
+    else:
+        body = COMPRESSORS[encoding](data)
+    if key is not None:
+        compressed_cache.set(key, body)
+    return body
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware: буферизует тело ответа и сжимает его, если клиент это поддерживает
+    и тело не меньше COMPRESSION_MIN_SIZE.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or headers.get("content-type", "").startswith(SKIP_CONTENT_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            data = b"".join(chunks)
+            headers = MutableHeaders(raw=start_message["headers"])
+            # Кодировку выбирали по Accept-Encoding, даже если короткое тело осталось несжатым
+            headers.add_vary_header("Accept-Encoding")
+            if len(data) >= COMPRESSION_MIN_SIZE:
+                data = await compress(encoding, data, scope["path"] in CACHEABLE_PATHS)
+                headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(data))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": data})
+
+        await self.app(scope, receive, send_compressed)
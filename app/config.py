@@ -5,4 +5,51 @@ from dotenv import load_dotenv
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 PASSWORD_USER_DB = os.getenv("PASSWORD_USER_DB")
-ALGORITHM = "HS256"
\ No newline at end of file
+ALGORITHM = "HS256"
+
+# Асинхронная БД: "postgresql" (asyncpg) или "sqlite" (aiosqlite, для локального запуска и тестов)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgresql")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "ecommerce.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_ECHO = os.getenv("DB_ECHO", "true").lower() == "true"
+# Создавать таблицы SQLite при старте приложения; app.serve создаёт их сам до запуска воркеров
+SQLITE_CREATE_TABLES = os.getenv("SQLITE_CREATE_TABLES", "true").lower() == "true"
+
+# Прогрев воркера при старте. Выставляется только app.serve: при запуске uvicorn app.main:app
+# напрямую прогрева нет, пока WARMUP=true не задан в окружении вручную
+WARMUP = os.getenv("WARMUP", "false").lower() == "true"
+
+# Ключи подписи JWT для ротации без простоя: "kid1:secret1,kid2:secret2".
+# Новые токены подписываются ключом JWT_ACTIVE_KID, проверка принимает любой из списка.
+JWT_KEYS = dict(item.split(":", 1) for item in os.getenv("JWT_KEYS", "").split(",") if item)
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID") or next(iter(JWT_KEYS), None)
+if JWT_ACTIVE_KID is not None and JWT_ACTIVE_KID not in JWT_KEYS:
+    raise RuntimeError(f"JWT_ACTIVE_KID={JWT_ACTIVE_KID!r} нет среди ключей JWT_KEYS")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Время жизни кэша похожих товаров в памяти воркера, секунд
+RECOMMENDATIONS_CACHE_TTL = int(os.getenv("RECOMMENDATIONS_CACHE_TTL", "300"))
+
+# Поток событий: сколько ждать новых событий в long-poll и как часто опрашивать outbox, секунд
+EVENTS_MAX_WAIT = float(os.getenv("EVENTS_MAX_WAIT", "30"))
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "0.5"))
+
+# Максимум одновременно объединяемых разных ключей на одну группу single-flight
+SINGLE_FLIGHT_MAX_IN_FLIGHT = int(os.getenv("SINGLE_FLIGHT_MAX_IN_FLIGHT", "1024"))
+
+# Архивация мягко удалённых строк: через сколько дней переносить, размер пачки и пауза между пачками
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_BATCH_PAUSE = float(os.getenv("ARCHIVE_BATCH_PAUSE", "0.1"))
+
+# Выборочное профилирование: включение, доля профилируемых запросов и период снимков стека, секунд
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.01"))
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.005"))
+
+# Сжатие ответов: минимальный размер тела, размер, начиная с которого сжатие уходит в поток,
+# и число сжатых тел в кэше для кэшируемых маршрутов
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", "65536"))
+COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", "128"))
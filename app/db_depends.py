@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 from app.database import SessionLocal
 
 
-async def get_db():
+def get_db():
+    # Обычный def: FastAPI выполнит блокирующую сессию в пуле потоков, а не в event loop
     db: Session = SessionLocal()
     try:
         yield db
@@ -1,19 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.routers import categories, products, users, reviews, events, admin, analytics
+from app.config import DB_BACKEND, SQLITE_CREATE_TABLES, WARMUP, PROFILING_ENABLED
+from app.database import async_engine, create_sqlite_tables
+from app.auth import hash_password
+from app.profiling import ProfilingMiddleware
+from app.compression import CompressionMiddleware
+
+
+async def warmup() -> None:
+    """
+    Прогревает воркер до приёма запросов: загружает бэкенд bcrypt и открывает соединение с БД.
+    Выполняется в каждом воркере при WARMUP=true, которое выставляет python -m app.serve.
+    """
+    await asyncio.to_thread(hash_password, "warmup")
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
 
-from app.routers import categories, products, users, reviews
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Готовит БД при старте и закрывает пул соединений при остановке.
+    """
+    if DB_BACKEND == "sqlite" and SQLITE_CREATE_TABLES:
+        await create_sqlite_tables()
+    if WARMUP:
+        await warmup()
+    yield
+    await async_engine.dispose()
 
 
 # Создаём приложение FastAPI
 app = FastAPI(
     title="FastAPI Интернет-магазин",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(CompressionMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Подключаем маршруты категорий и товаров
 app.include_router(categories.router)
 app.include_router(products.router)
 app.include_router(users.router)
 app.include_router(reviews.router)
+app.include_router(events.router)
+app.include_router(admin.router)
+app.include_router(analytics.router)
 
 # Корневой эндпоинт для проверки
 @app.get("/")
@@ -21,4 +61,4 @@ async def root():
     """
     Корневой маршрут, подтверждающий, что API работает.
     """
-    return {"message": "Добро пожаловать в API интернет-магазина!"}
\ No newline at end of file
+    return {"message": "Добро пожаловать в API интернет-магазина!"}
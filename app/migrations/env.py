@@ -1,14 +1,16 @@
 import asyncio
 from logging.config import fileConfig
 
-from sqlalchemy import pool
+from sqlalchemy import pool, text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
+from alembic.runtime.migration import MigrationContext
 
 from app.database import Base
 from app import models
+from app import online_migrations
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -55,7 +57,35 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def run_dry_run(connection: Connection) -> None:
+    """
+    Пробный запуск: SQL миграций от текущей ревизии БД выводится, как с --sql, и не выполняется.
+    Соединение в транзакции только для чтения — через него читаются ревизия и статистика для оценок.
+    """
+    transaction = connection.begin()
+    try:
+        connection.execute(text("SET TRANSACTION READ ONLY"))
+        heads = MigrationContext.configure(connection).get_current_heads()
+        online_migrations.dry_run_connection = connection
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            as_sql=True,
+            literal_binds=True,
+            starting_rev=heads or None,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        online_migrations.dry_run_connection = None
+        transaction.rollback()
+
+
 def do_run_migrations(connection: Connection) -> None:
+    if online_migrations.dry_run_requested():
+        run_dry_run(connection)
+        return
+
     context.configure(connection=connection, target_metadata=target_metadata)
 
     with context.begin_transaction():
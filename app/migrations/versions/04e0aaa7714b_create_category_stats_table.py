@@ -0,0 +1,76 @@
+"""Create category stats table
+
+Revision ID: 04e0aaa7714b
+Revises: bc7e00cca99e
+Create Date: 2025-11-15 18:03:52.771640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.online_migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '04e0aaa7714b'
+down_revision: Union[str, Sequence[str], None] = 'bc7e00cca99e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('category_stats',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.Column('total_product_count', sa.Integer(), nullable=False),
+    sa.Column('min_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('max_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('avg_rating', sa.Float(), nullable=False),
+    sa.Column('rating_sum', sa.Float(), nullable=False),
+    sa.Column('rated_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint('category_id')
+    )
+
+    # Заполняем агрегаты для уже существующих категорий
+    op.execute(
+        """
+        INSERT INTO category_stats (category_id, product_count, total_product_count,
+                                    min_price, max_price, avg_rating, rating_sum, rated_count)
+        SELECT c.id, count(p.id), 0, min(p.price), max(p.price),
+               coalesce(avg(p.rating) FILTER (WHERE p.rating > 0), 0),
+               coalesce(sum(p.rating) FILTER (WHERE p.rating > 0), 0),
+               count(p.id) FILTER (WHERE p.rating > 0)
+        FROM categories c
+        LEFT JOIN products p ON p.category_id = c.id AND p.is_active
+        GROUP BY c.id
+        """
+    )
+    op.execute(
+        """
+        WITH RECURSIVE tree AS (
+            SELECT id AS root_id, id FROM categories
+            UNION ALL
+            SELECT t.root_id, c.id FROM categories c
+            JOIN tree t ON c.parent_id = t.id
+            WHERE c.is_active
+        )
+        UPDATE category_stats s SET total_product_count = sub.total
+        FROM (
+            SELECT t.root_id, sum(cs.product_count) AS total
+            FROM tree t JOIN category_stats cs ON cs.category_id = t.id
+            GROUP BY t.root_id
+        ) sub
+        WHERE s.category_id = sub.root_id
+        """
+    )
+    create_index_concurrently('ix_products_category_id', 'products', ['category_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_products_category_id', 'products')
+    op.drop_table('category_stats')
@@ -0,0 +1,87 @@
+"""Partition reviews by hash of product_id
+
+Revision ID: 3c8d41f2a9e7
+Revises: b9aa3ba395fd
+Create Date: 2026-01-10 11:20:47.593812
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.online_migrations import is_dry_run, report, table_stats, lock_timeout
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8d41f2a9e7'
+down_revision: Union[str, Sequence[str], None] = 'b9aa3ba395fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+
+COLUMNS = "id, user_id, product_id, comment, comment_date, grade, is_active, deactivated_at"
+
+
+def create_reviews_table(partitioned: bool) -> None:
+    op.create_table('reviews',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('reviews_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('comment_date', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('grade', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('deactivated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    # Ключ секционированной таблицы обязан содержать ключ секционирования
+    sa.PrimaryKeyConstraint('product_id', 'id') if partitioned else sa.PrimaryKeyConstraint('id'),
+    **({'postgresql_partition_by': 'HASH (product_id)'} if partitioned else {})
+    )
+
+
+def swap_reviews_table(partitioned: bool) -> None:
+    """
+    Секционирование нельзя включить через ALTER TABLE: создаём новую таблицу reviews,
+    переносим строки и удаляем старую. Всё время копирования старая таблица заблокирована,
+    поэтому на больших объёмах миграцию запускают в окно обслуживания (оценка — dry_run).
+    Сравнение с несекционированной таблицей: python -m app.bench_reviews.
+    """
+    if is_dry_run():
+        rows, size = table_stats('reviews')
+        report(f"перенос reviews: ~{rows} строк, {size / 1024 / 1024:.1f} МБ под ACCESS EXCLUSIVE")
+    with lock_timeout():
+        op.execute("LOCK TABLE reviews IN ACCESS EXCLUSIVE MODE")
+    op.rename_table('reviews', 'reviews_old')
+    op.execute("ALTER TABLE reviews_old RENAME CONSTRAINT reviews_pkey TO reviews_old_pkey")
+    op.drop_index('uq_reviews_user_product_active', table_name='reviews_old')
+    op.drop_index('ix_reviews_id', table_name='reviews_old', if_exists=True)
+
+    create_reviews_table(partitioned)
+    if partitioned:
+        for remainder in range(PARTITIONS):
+            op.execute(f"CREATE TABLE reviews_p{remainder:02d} PARTITION OF reviews "
+                       f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})")
+    # Последовательность id переходит к новой таблице, чтобы не удалиться вместе со старой
+    op.execute("ALTER SEQUENCE reviews_id_seq OWNED BY reviews.id")
+    op.execute(f"INSERT INTO reviews ({COLUMNS}) SELECT {COLUMNS} FROM reviews_old")
+    op.drop_table('reviews_old')
+
+    # Индексы строятся после копирования — так быстрее, чем обновлять их на каждую строку
+    op.create_index('uq_reviews_user_product_active', 'reviews', ['user_id', 'product_id'],
+                    unique=True, postgresql_where=sa.text('is_active'))
+    # Выборки по одному id (удаление, архив, аналитика) без ключа секционирования
+    op.create_index('ix_reviews_id', 'reviews', ['id'])
+    op.execute("ANALYZE reviews")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    swap_reviews_table(partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    swap_reviews_table(partitioned=False)
@@ -0,0 +1,61 @@
+"""Create product changes table
+
+Revision ID: 60ae31394a13
+Revises: 82729d1d0cb1
+Create Date: 2025-12-06 13:20:44.615027
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '60ae31394a13'
+down_revision: Union[str, Sequence[str], None] = '82729d1d0cb1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_changes',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('change_type', sa.String(length=10), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    # Несколько изменений товара в одной пачке получают одно время, поэтому ключ — id
+    sa.PrimaryKeyConstraint('id', 'changed_at'),
+    postgresql_partition_by='RANGE (changed_at)'
+    )
+    op.create_index('ix_product_changes_product_id_changed_at', 'product_changes',
+                    ['product_id', 'changed_at', 'id'])
+    op.execute("CREATE TABLE product_changes_default PARTITION OF product_changes DEFAULT")
+
+    # Секции на год вперёд, дальше их создаёт python -m app.partitions
+    today = date.today()
+    for offset in range(13):
+        year, month = today.year + (today.month - 1 + offset) // 12, (today.month - 1 + offset) % 12 + 1
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        op.execute(f"CREATE TABLE product_changes_y{year}m{month:02d} PARTITION OF product_changes "
+                   f"FOR VALUES FROM ('{start}') TO ('{end}')")
+
+    # Начальная точка истории для уже существующих товаров
+    op.execute(
+        """
+        INSERT INTO product_changes (product_id, changed_at, change_type, price, stock)
+        SELECT id, now(), 'create', price, stock FROM products
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table('product_changes')
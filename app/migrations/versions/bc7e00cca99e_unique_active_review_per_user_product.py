@@ -0,0 +1,39 @@
+"""Unique active review per user and product
+
+Revision ID: bc7e00cca99e
+Revises: b71c5eb82191
+Create Date: 2025-11-08 14:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.online_migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bc7e00cca99e'
+down_revision: Union[str, Sequence[str], None] = 'b71c5eb82191'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Оставляем только последний активный отзыв пользователя на товар, иначе индекс не создастся
+    op.execute(
+        """
+        UPDATE reviews SET is_active = false
+        WHERE is_active AND id NOT IN (
+            SELECT max(id) FROM reviews WHERE is_active GROUP BY user_id, product_id
+        )
+        """
+    )
+    create_index_concurrently('uq_reviews_user_product_active', 'reviews', ['user_id', 'product_id'],
+                              unique=True, where='is_active')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('uq_reviews_user_product_active', 'reviews')
@@ -0,0 +1,75 @@
+"""Add deactivated_at and archive tables
+
+Revision ID: fb7c5dde630c
+Revises: 5117ad454b7b
+Create Date: 2025-12-20 17:08:36.550182
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fb7c5dde630c'
+down_revision: Union[str, Sequence[str], None] = '5117ad454b7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('categories', 'products', 'reviews'):
+        op.add_column(table, sa.Column('deactivated_at', sa.DateTime(timezone=True), nullable=True))
+
+    # История цен должна переживать перенос товара в архив
+    op.drop_constraint('product_changes_product_id_fkey', 'product_changes', type_='foreignkey')
+
+    op.create_table('categories_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('deactivated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('products_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(length=500), nullable=True),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('image_url', sa.String(length=200), nullable=True),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('deactivated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Float(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reviews_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('comment_date', sa.DateTime(), nullable=False),
+    sa.Column('grade', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('deactivated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('reviews_archive')
+    op.drop_table('products_archive')
+    op.drop_table('categories_archive')
+    op.create_foreign_key('product_changes_product_id_fkey', 'product_changes', 'products',
+                          ['product_id'], ['id'])
+    for table in ('reviews', 'products', 'categories'):
+        op.drop_column(table, 'deactivated_at')
@@ -2,6 +2,15 @@ from .categories import Category
 from .products import Product
 from .users import User
 from .reviews import Review
+from .category_stats import CategoryStats
+from .revoked_tokens import RevokedToken
+from .product_similarities import ProductSimilarity
+from .product_changes import ProductChange
+from .change_events import ChangeEvent
+from .analytics import ProductDailyStats, AnalyticsWatermark
+from .archive import categories_archive, products_archive, reviews_archive
 
 
-__all__ = ["Category", "Product", "User", "Review"]
+__all__ = ["Category", "Product", "User", "Review", "CategoryStats", "RevokedToken", "ProductSimilarity",
+           "ProductChange", "ChangeEvent", "ProductDailyStats", "AnalyticsWatermark",
+           "categories_archive", "products_archive", "reviews_archive"]
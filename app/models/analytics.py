@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from sqlalchemy import ForeignKey, Integer, BigInteger, String, Date, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ProductDailyStats(Base):
+    """
+    Дневные агрегаты товара для аналитики продавца: отзывы за день и остаток на конец дня.
+    Заполняются инкрементально задачей app.analytics.
+    """
+    __tablename__ = "product_daily_stats"
+    __table_args__ = (
+        Index("ix_product_daily_stats_seller_day", "seller_id", "day"),
+    )
+
+    # Без внешнего ключа на products: статистика остаётся после переноса товара в архив
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    seller_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    review_count: Mapped[int] = mapped_column(Integer, default=0)
+    grade_sum: Mapped[int] = mapped_column(Integer, default=0)
+    stock: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+
+class AnalyticsWatermark(Base):
+    """
+    До какого места обработаны исходные данные. Обрабатывается окно (processed, snapshot],
+    где snapshot снят при прошлом запуске: к этому моменту все транзакции, начатые до него,
+    уже зафиксированы, и строки с меньшими id/временем не появятся задним числом.
+    """
+    __tablename__ = "analytics_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    processed_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    snapshot_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    snapshot_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
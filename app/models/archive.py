@@ -0,0 +1,22 @@
+from sqlalchemy import Table, Column, DateTime
+
+from app.database import Base
+from app.models.categories import Category
+from app.models.products import Product
+from app.models.reviews import Review
+
+
+def archive_table(source: Table) -> Table:
+    """
+    Таблица-архив с теми же колонками, что и source, плюс archived_at.
+    Без внешних ключей и вторичных индексов: архив только хранит данные для восстановления.
+    """
+    columns = [Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+               for column in source.columns]
+    return Table(f"{source.name}_archive", Base.metadata,
+                 *columns, Column("archived_at", DateTime(timezone=True), nullable=False))
+
+
+categories_archive = archive_table(Category.__table__)
+products_archive = archive_table(Product.__table__)
+reviews_archive = archive_table(Review.__table__)
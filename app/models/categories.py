@@ -1,5 +1,6 @@
 from typing import Optional
-from sqlalchemy import Integer, String, Boolean
+from datetime import datetime
+from sqlalchemy import Integer, String, Boolean, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import ForeignKey
 
@@ -17,6 +18,7 @@ class Category(Base):
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     parent_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id"), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    deactivated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     products: Mapped[list["Product"]] = relationship("Product", back_populates="category")
 
@@ -0,0 +1,157 @@
+from decimal import Decimal
+from typing import NamedTuple
+from sqlalchemy import ForeignKey, Integer, Numeric, Float, select, update, func, case, literal
+from sqlalchemy.orm import Mapped, mapped_column, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Base
+
+
+class CategoryStats(Base):
+    """
+    Предрассчитанные агрегаты категории. Обновляются приращениями при изменении товаров и отзывов
+и пересчётом счётчиков предков при изменении категорий.
+    """
+    __tablename__ = "category_stats"
+
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), primary_key=True)
+    product_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Товары категории вместе со всеми активными подкатегориями
+    total_product_count: Mapped[int] = mapped_column(Integer, default=0)
+    min_price: Mapped[Decimal | None] = mapped_column(Numeric(10, 2), nullable=True)
+    max_price: Mapped[Decimal | None] = mapped_column(Numeric(10, 2), nullable=True)
+    avg_rating: Mapped[float] = mapped_column(Float, default=0.0)
+    # Сумма и число ненулевых рейтингов товаров: avg_rating = rating_sum / rated_count
+    rating_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    rated_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ProductState(NamedTuple):
+    """
+    То, что товар вносит в агрегаты категории.
+    """
+    category_id: int
+    price: Decimal
+    rating: float
+    is_active: bool
+
+
+def product_state(product, **changes) -> ProductState:
+    """
+    Состояние товара; changes подменяют поля, например для ещё не перечитанного из БД товара.
+    """
+    state = ProductState(product.category_id, product.price, product.rating or 0.0, product.is_active)
+    state = state._replace(**changes)
+    return state._replace(price=Decimal(str(state.price)))
+
+
+async def update_category_stats(db: AsyncSession, old: ProductState | None, new: ProductState | None) -> None:
+    """
+    Применяет к агрегатам изменение одного товара: old — до записи, new — после (None — товара нет).
+    Вызывается после записи товара в БД: границы цены при необходимости пересчитываются запросом.
+    """
+    old = old if old is not None and old.is_active else None
+    new = new if new is not None and new.is_active else None
+    if old == new:
+        return
+    for category_id in {state.category_id for state in (old, new) if state is not None}:
+        await apply_stats_delta(db, category_id,
+                                old if old is not None and old.category_id == category_id else None,
+                                new if new is not None and new.category_id == category_id else None)
+
+
+def rated(state: ProductState | None) -> tuple[float, int]:
+    """
+    Вклад товара в rating_sum и rated_count: товары без отзывов в средний рейтинг не входят.
+    """
+    if state is None or state.rating <= 0:
+        return 0.0, 0
+    return state.rating, 1
+
+
+async def apply_stats_delta(db: AsyncSession, category_id: int,
+                            removed: ProductState | None, added: ProductState | None) -> None:
+    """
+    Убирает вклад removed и добавляет вклад added в агрегаты одной категории.
+    """
+    values = {}
+    (old_sum, old_rated), (new_sum, new_rated) = rated(removed), rated(added)
+    if (old_sum, old_rated) != (new_sum, new_rated):
+        rating_sum = CategoryStats.rating_sum + (new_sum - old_sum)
+        rated_count = CategoryStats.rated_count + (new_rated - old_rated)
+        values.update(rating_sum=rating_sum, rated_count=rated_count,
+                      avg_rating=case((rated_count > 0, rating_sum / rated_count), else_=literal(0.0)))
+
+    count_delta = (added is not None) - (removed is not None)
+    if count_delta:
+        values["product_count"] = CategoryStats.product_count + count_delta
+
+    old_price = removed.price if removed is not None else None
+    new_price = added.price if added is not None else None
+    if old_price != new_price:
+        # Блокировка строки: границы читаются и записываются не одним UPDATE
+        min_price, max_price = (await db.execute(
+            select(CategoryStats.min_price, CategoryStats.max_price)
+            .where(CategoryStats.category_id == category_id).with_for_update()
+        )).one()
+        if old_price is not None and min_price is not None and (old_price <= min_price or old_price >= max_price):
+            # Ушла текущая граница — пересчитываем по товарам категории (новое состояние уже в БД)
+            from app.models.products import Product
+            min_price, max_price = (await db.execute(
+                select(func.min(Product.price), func.max(Product.price))
+                .where(Product.category_id == category_id, Product.is_active)
+            )).one()
+        elif new_price is not None:
+            min_price = new_price if min_price is None else min(min_price, new_price)
+            max_price = new_price if max_price is None else max(max_price, new_price)
+        values.update(min_price=min_price, max_price=max_price)
+
+    if values:
+        await db.execute(update(CategoryStats).where(CategoryStats.category_id == category_id).values(**values))
+    if count_delta:
+        await add_to_total_counts(db, category_id, count_delta)
+
+
+async def add_to_total_counts(db: AsyncSession, category_id: int, delta: int) -> None:
+    """
+    Прибавляет delta к total_product_count категории и её предков. Неактивная категория
+    в сумму родителя не входит, поэтому выше неё изменение не поднимается.
+    """
+    from app.models.categories import Category
+    chain = (
+        select(Category.id, Category.parent_id, Category.is_active)
+        .where(Category.id == category_id)
+        .cte("chain", recursive=True)
+    )
+    parent = aliased(Category)
+    chain = chain.union_all(
+        select(parent.id, parent.parent_id, parent.is_active)
+        .join(chain, parent.id == chain.c.parent_id)
+        .where(chain.c.is_active)
+    )
+    await db.execute(
+        update(CategoryStats)
+        .where(CategoryStats.category_id.in_(select(chain.c.id)))
+        .values(total_product_count=CategoryStats.total_product_count + delta)
+    )
+
+
+async def recalculating_total_counts(db: AsyncSession, category_id: int | None) -> None:
+    """
+    Поднимается от категории к корню, пересчитывая total_product_count по прямым активным детям.
+    """
+    from app.models.categories import Category
+    child_stats = aliased(CategoryStats)
+    while category_id is not None:
+        children_total = (
+            select(func.coalesce(func.sum(child_stats.total_product_count), 0))
+            .join(Category, Category.id == child_stats.category_id)
+            .where(Category.parent_id == category_id, Category.is_active)
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(CategoryStats)
+            .where(CategoryStats.category_id == category_id)
+            .values(total_product_count=CategoryStats.product_count + children_total)
+        )
+        category_id = await db.scalar(select(Category.parent_id).where(Category.id == category_id))
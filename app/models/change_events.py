@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Integer, String, JSON, DateTime, func, select
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Base, async_engine
+
+# Произвольный ключ advisory-блокировки outbox
+OUTBOX_LOCK_ID = 3_300_001
+
+
+class ChangeEvent(Base):
+    """
+    Outbox: события об изменениях каталога для внешних потребителей.
+    Пишутся в той же транзакции, что и само изменение; seq растёт монотонно.
+    """
+    __tablename__ = "change_events"
+
+    seq: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    entity: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    action: Mapped[str] = mapped_column(String(10), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+async def add_change_event(db: AsyncSession, entity: str, entity_id: int, action: str, payload: dict) -> None:
+    """
+    Добавляет событие в outbox текущей транзакции. Вызывать последним перед commit.
+
+    В PostgreSQL транзакционная advisory-блокировка выстраивает пишущие транзакции
+    в очередь, поэтому события фиксируются в порядке seq и потребитель, читающий
+    «после seq N», не пропустит событие с меньшим номером, закоммиченное позже.
+    """
+    if async_engine.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(OUTBOX_LOCK_ID)))
+    db.add(ChangeEvent(entity=entity, entity_id=entity_id, action=action, payload=payload))
+    await db.flush()
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlalchemy import BigInteger, Integer, Numeric, String, DateTime, Identity, Index, insert
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Base
+
+
+class ProductChange(Base):
+    """
+    Журнал изменений цены и остатка товара (только добавление).
+    В PostgreSQL таблица секционирована по месяцам по changed_at.
+    """
+    __tablename__ = "product_changes"
+    # Ключ секционированной таблицы включает changed_at; в SQLite секций нет, и ключ — один id.
+    # Индекс обслуживает постраничную выборку истории товара по (changed_at, id)
+    __table_args__ = (
+        Index("ix_product_changes_product_id_changed_at", "product_id", "changed_at", "id"),
+        {"postgresql_partition_by": "RANGE (changed_at)", "info": {"sqlite_primary_key": "id"}},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    # Без внешнего ключа: история остаётся после переноса товара в архив
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    change_type: Mapped[str] = mapped_column(String(10), nullable=False)
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+async def log_product_changes(db: AsyncSession, changes: list[dict]) -> None:
+    """
+    Записывает изменения товаров одним пакетным INSERT в текущей транзакции.
+    Каждое изменение — словарь с product_id, change_type, price и stock.
+    """
+    if not changes:
+        return
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(ProductChange), [{"changed_at": now, **change} for change in changes])
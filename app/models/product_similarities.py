@@ -0,0 +1,15 @@
+from sqlalchemy import ForeignKey, Float
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ProductSimilarity(Base):
+    """
+    Top-K похожих товаров для каждого товара, рассчитанные офлайн по оценкам пользователей.
+    """
+    __tablename__ = "product_similarities"
+
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), primary_key=True)
+    similar_product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
@@ -1,11 +1,13 @@
-from sqlalchemy import String, Boolean, Float, Integer, Numeric
+from sqlalchemy import String, Boolean, Float, Integer, Numeric, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import ForeignKey
 from decimal import Decimal
+from datetime import datetime
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import Base
+from app.models.rows import row_type
 
 from typing import TYPE_CHECKING
 
@@ -23,7 +25,8 @@ class Product(Base):
     image_url: Mapped[str | None] = mapped_column(String(200), nullable=True)
     stock: Mapped[int] = mapped_column(Integer, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)
+    deactivated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False, index=True)
     seller_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
 
     category: Mapped["Category"] = relationship("Category", back_populates="products")
@@ -34,4 +37,9 @@ class Product(Base):
     async def recalculating_rating(self, db: AsyncSession) -> None:
         from app.models.reviews import Review
         avg_rating = await db.scalar(select(func.avg(Review.grade)).where(Review.product_id == self.id, Review.is_active))
-        self.rating = avg_rating or 0.0
\ No newline at end of file
+        self.rating = avg_rating or 0.0
+
+
+ProductRow = row_type("ProductRow", [Product.id, Product.name, Product.description, Product.price,
+                                     Product.image_url, Product.stock, Product.category_id,
+                                     Product.is_active, Product.rating])
@@ -1,9 +1,10 @@
 from sqlalchemy import ForeignKey
-from sqlalchemy import Text, func
+from sqlalchemy import Text, func, Index, text, DateTime, PrimaryKeyConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 from datetime import datetime
 from app.database import Base
+from app.models.rows import row_type
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -12,7 +13,17 @@ if TYPE_CHECKING:
     
 class Review(Base):
     __tablename__ = "reviews"
-    id: Mapped[int] = mapped_column(primary_key=True)
+    # Один активный отзыв пользователя на товар — проверяется индексом, а не запросом.
+    # В PostgreSQL таблица секционирована по хешу product_id, ключ обязан его содержать — (product_id, id),
+    # как в миграции 3c8d41f2a9e7. В SQLite ключом остаётся id, чтобы база сама выдавала его значения
+    __table_args__ = (
+        PrimaryKeyConstraint("product_id", "id"),
+        Index("uq_reviews_user_product_active", "user_id", "product_id", unique=True,
+              postgresql_where=text("is_active"), sqlite_where=text("is_active")),
+        Index("ix_reviews_id", "id"),
+        {"postgresql_partition_by": "HASH (product_id)", "info": {"sqlite_primary_key": "id"}},
+    )
+    id: Mapped[int] = mapped_column(autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
     user: Mapped["User"] = relationship("User", uselist=False, back_populates="reviews")
@@ -20,4 +31,9 @@ class Review(Base):
     comment: Mapped[Optional[str]] = mapped_column(Text)
     comment_date: Mapped[datetime] = mapped_column(server_default=func.now())
     grade: Mapped[int] = mapped_column(nullable=False)
-    is_active: Mapped[bool] = mapped_column(default=True)
\ No newline at end of file
+    is_active: Mapped[bool] = mapped_column(default=True)
+    deactivated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+ReviewRow = row_type("ReviewRow", [Review.id, Review.user_id, Review.product_id, Review.comment,
+                                   Review.comment_date, Review.grade, Review.is_active])
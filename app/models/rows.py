@@ -0,0 +1,20 @@
+def row_type(name: str, columns: list) -> type:
+    """
+    Создаёт компактный тип строки с __slots__ под набор колонок для read-only списков:
+    select(*RowType.columns) не заполняет identity map и не создаёт ORM-объекты.
+    """
+    fields = tuple(column.key for column in columns)
+
+    def __init__(self, *values):
+        for field, value in zip(fields, values):
+            setattr(self, field, value)
+
+    def __repr__(self):
+        return f"{name}({', '.join(f'{field}={getattr(self, field)!r}' for field in fields)})"
+
+    @classmethod
+    def from_result(cls, result) -> list:
+        return [cls(*row) for row in result]
+
+    return type(name, (), {"__slots__": fields, "columns": tuple(columns), "__init__": __init__,
+                           "__repr__": __repr__, "from_result": from_result})
@@ -0,0 +1,173 @@
+"""
+Помощники для миграций без долгих блокировок (PostgreSQL), вызываются из app/migrations/versions:
+
+- create_index_concurrently / drop_index_concurrently — индекс строится без блокировки записи;
+- batched_backfill — UPDATE пачками по первичному ключу, каждая пачка в своей транзакции,
+  с паузой между пачками и контрольной точкой, с которой можно продолжить после сбоя;
+- lock_timeout — обычный DDL падает быстро, а не встаёт в очередь за долгим запросом,
+  блокируя за собой весь трафик к таблице.
+
+Пробный запуск: alembic -x dry_run=true upgrade head — SQL миграций печатается, как с --sql, но
+ничего не выполняется; подключение к БД (только чтение) нужно для текущей ревизии и оценок
+длительности по статистике таблиц, которые печатаются перед соответствующими операциями.
+
+В offline-режиме (alembic upgrade --sql) индексы выводятся обычным SQL без обращения к каталогу;
+пробный запуск и batched_backfill требуют подключения к БД и в этом режиме завершаются ошибкой.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from alembic import context, op
+
+# Оценочная скорость для пробного запуска; подбирается по замерам на своём железе
+INDEX_BUILD_BYTES_PER_SEC = int(os.getenv("INDEX_BUILD_BYTES_PER_SEC", str(50 * 1024 * 1024)))
+BACKFILL_ROWS_PER_SEC = int(os.getenv("BACKFILL_ROWS_PER_SEC", "20000"))
+
+checkpoints = sa.table(
+    "online_migration_checkpoints",
+    sa.column("name", sa.String),
+    sa.column("last_id", sa.BigInteger),
+)
+
+
+# Соединение пробного запуска: SQL миграций выводится как при --sql, а оценки читаются через него
+dry_run_connection: sa.engine.Connection | None = None
+
+
+def require_online(operation: str) -> None:
+    if context.is_offline_mode() and dry_run_connection is None:
+        raise RuntimeError(f"{operation} требует подключения к БД и не работает с alembic --sql")
+
+
+def dry_run_requested() -> bool:
+    return context.get_x_argument(as_dictionary=True).get("dry_run", "false").lower() == "true"
+
+
+def is_dry_run() -> bool:
+    dry_run = dry_run_requested()
+    if dry_run:
+        require_online("Пробный запуск (-x dry_run=true)")
+    return dry_run
+
+
+def report(message: str) -> None:
+    print(f"[online-migration] {message}")
+
+
+def table_stats(table: str) -> tuple[int, int]:
+    """
+    Оценка числа строк и размера таблицы с индексами по статистике планировщика.
+    """
+    row = dry_run_connection.execute(
+        sa.text("SELECT greatest(reltuples, 0)::bigint, pg_total_relation_size(oid) "
+                "FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table},
+    ).first()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def estimate_rows(table: str, where: str) -> int:
+    """
+    Оценка числа строк под условием по плану запроса, без его выполнения.
+    """
+    plan = dry_run_connection.execute(sa.text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE {where}")).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+@contextmanager
+def lock_timeout(timeout: str = "2s"):
+    """
+    Ограничивает ожидание блокировки для DDL внутри блока (SET LOCAL действует до конца транзакции).
+    """
+    op.execute(f"SET LOCAL lock_timeout = '{timeout}'")
+    try:
+        yield
+    finally:
+        op.execute("SET LOCAL lock_timeout = DEFAULT")
+
+
+def create_index_concurrently(name: str, table: str, columns: list[str], unique: bool = False,
+                              where: str | None = None) -> None:
+    """
+    Создаёт индекс через CREATE INDEX CONCURRENTLY. Невалидный индекс, оставшийся
+    от прерванной попытки, сначала удаляется.
+    """
+    if is_dry_run():
+        _, size = table_stats(table)
+        report(f"CREATE INDEX CONCURRENTLY {name} ON {table}: ~{size / INDEX_BUILD_BYTES_PER_SEC:.0f} с "
+               f"(таблица {size / 1024 / 1024:.1f} МБ)")
+    if context.is_offline_mode():
+        # Состояние индекса в каталоге неизвестно: удаляем возможный невалидный остаток и строим заново
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                       f"ON {table} ({', '.join(columns)}){f' WHERE {where}' if where else ''}")
+        return
+    kwargs = {"postgresql_where": sa.text(where)} if where else {}
+    with op.get_context().autocommit_block():
+        invalid = op.get_bind().execute(
+            sa.text("SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"),
+            {"name": name},
+        ).first()
+        if invalid:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True,
+                        if_not_exists=True, **kwargs)
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def batched_backfill(name: str, table: str, set_clause: str, where: str = "true", key: str = "id",
+                     batch_size: int = 5000, pause: float = 0.1, batch_lock_timeout: str = "1s") -> None:
+    """
+    Выполняет UPDATE {table} SET {set_clause} WHERE {where} пачками по {key}.
+
+    Каждая пачка — отдельная короткая транзакция; после неё сохраняется контрольная
+    точка name, поэтому прерванную миграцию можно запустить заново, и она продолжит
+    с последней пачки. При сбое между пачкой и контрольной точкой пачка повторится,
+    поэтому обновление должно быть идемпотентным.
+    """
+    require_online(f"backfill {name}")
+    if is_dry_run():
+        rows = estimate_rows(table, where)
+        batches = -(-rows // batch_size)
+        seconds = rows / BACKFILL_ROWS_PER_SEC + batches * pause
+        report(f"backfill {name}: ~{rows} строк, {batches} пачек по {batch_size}, ~{seconds:.0f} с")
+        op.execute(f"-- UPDATE {table} SET {set_clause} WHERE {where} (пачками по {key})")
+        return
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        bind.execute(sa.text("CREATE TABLE IF NOT EXISTS online_migration_checkpoints "
+                             "(name varchar(100) PRIMARY KEY, last_id bigint NOT NULL)"))
+        last_id = bind.execute(sa.select(checkpoints.c.last_id).where(checkpoints.c.name == name)).scalar()
+        if last_id is None:
+            last_id = bind.execute(sa.text(f"SELECT coalesce(min({key}), 0) - 1 FROM {table}")).scalar()
+            bind.execute(sa.insert(checkpoints).values(name=name, last_id=last_id))
+        # В autocommit каждый оператор — своя транзакция; пачка не ждёт блокировку дольше таймаута
+        bind.execute(sa.text(f"SET lock_timeout = '{batch_lock_timeout}'"))
+        updated_total = 0
+        while True:
+            upper = bind.execute(
+                sa.text(f"SELECT max({key}) FROM (SELECT {key} FROM {table} WHERE {key} > :last_id "
+                        f"ORDER BY {key} LIMIT :batch_size) AS batch"),
+                {"last_id": last_id, "batch_size": batch_size},
+            ).scalar()
+            if upper is None:
+                break
+            result = bind.execute(
+                sa.text(f"UPDATE {table} SET {set_clause} "
+                        f"WHERE {key} > :last_id AND {key} <= :upper AND ({where})"),
+                {"last_id": last_id, "upper": upper},
+            )
+            bind.execute(sa.update(checkpoints).where(checkpoints.c.name == name).values(last_id=upper))
+            last_id = upper
+            updated_total += result.rowcount
+            time.sleep(pause)
+        bind.execute(sa.text("RESET lock_timeout"))
+        bind.execute(sa.delete(checkpoints).where(checkpoints.c.name == name))
+        report(f"backfill {name}: обновлено {updated_total} строк")
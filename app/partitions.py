@@ -0,0 +1,54 @@
+"""
+Заблаговременное создание месячных секций журнала изменений товаров: python -m app.partitions
+
+Запускать по расписанию (например, раз в неделю). Строки за месяц без своей секции
+попадают в product_changes_default, поэтому секции нужно создавать заранее.
+"""
+import asyncio
+import os
+from datetime import date
+
+from sqlalchemy import text
+
+from app.database import async_engine
+
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+
+def month_start(year: int, month: int) -> date:
+    """
+    Первое число месяца; month может выходить за 1..12.
+    """
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return date(year, month, 1)
+
+
+def month_partition_ddl(table: str, start: date) -> str:
+    """
+    DDL секции таблицы за месяц, начинающийся с start.
+    """
+    end = month_start(start.year, start.month + 1)
+    return (f"CREATE TABLE IF NOT EXISTS {table}_y{start.year}m{start.month:02d} "
+            f"PARTITION OF {table} FOR VALUES FROM ('{start}') TO ('{end}')")
+
+
+async def create_month_partitions(table: str = "product_changes", months_ahead: int = MONTHS_AHEAD) -> None:
+    """
+    Создаёт секции с текущего месяца на months_ahead месяцев вперёд (только PostgreSQL).
+    """
+    if async_engine.dialect.name != "postgresql":
+        return
+    today = date.today()
+    async with async_engine.begin() as conn:
+        for offset in range(months_ahead + 1):
+            await conn.execute(text(month_partition_ddl(table, month_start(today.year, today.month + offset))))
+
+
+async def main() -> None:
+    await create_month_partitions()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Выборочное профилирование запросов в продакшене (включается PROFILING_ENABLED=true).
+
+Профилируется доля запросов PROFILING_SAMPLE_RATE и любой запрос с заголовком X-Profile: 1.
+Пока такой запрос выполняется, фоновый поток каждые PROFILING_INTERVAL секунд снимает
+стек потока event loop. Стеки копятся по шаблону маршрута в свёрнутом формате
+(«frame;frame;frame count»), который понимают flamegraph.pl и speedscope.
+
+Event loop обслуживает запросы вперемешку, поэтому снимок при нескольких одновременных
+профилируемых запросах засчитывается каждому из них — это оценка, а не точный учёт.
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from app.config import PROFILING_SAMPLE_RATE, PROFILING_INTERVAL
+
+PROFILE_HEADER = b"x-profile"
+MAX_STACK_DEPTH = 64
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse_stack(frame) -> str:
+    """
+    Стек от корня к текущей функции в одну строку через «;».
+    """
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        frames.append(format_frame(frame))
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class StackSampler:
+    """
+    Фоновый поток, снимающий стек потока event loop, пока идёт хотя бы один профилируемый запрос.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._ids = itertools.count()
+        self._active: dict[int, tuple[int, Counter]] = {}
+        self.routes: dict[str, Counter] = defaultdict(Counter)
+        self.requests: Counter = Counter()
+        self._thread: threading.Thread | None = None
+
+    def start_request(self, thread_id: int) -> int:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+        token = next(self._ids)
+        with self._lock:
+            self._active[token] = (thread_id, Counter())
+        self._wakeup.set()
+        return token
+
+    def finish_request(self, token: int, route: str) -> None:
+        with self._lock:
+            _, stacks = self._active.pop(token)
+            self.routes[route].update(stacks)
+            self.requests[route] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes.clear()
+            self.requests.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.values():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse_stack(frame)] += 1
+                del frames
+            time.sleep(self.interval)
+
+
+sampler = StackSampler(PROFILING_INTERVAL)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware: решает, профилировать ли запрос, и относит снимки к шаблону маршрута.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_sample(scope):
+            await self.app(scope, receive, send)
+            return
+        token = sampler.start_request(threading.get_ident())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            # Шаблон пути, а не сам путь, чтобы число ключей не росло с числом id
+            sampler.finish_request(token, f"{scope['method']} {route.path if route else '<unmatched>'}")
+
+    @staticmethod
+    def should_sample(scope) -> bool:
+        if random.random() < PROFILING_SAMPLE_RATE:
+            return True
+        return any(name == PROFILE_HEADER and value == b"1" for name, value in scope["headers"])
@@ -0,0 +1,90 @@
+"""
+Офлайн-расчёт похожих товаров («их также высоко оценили»): python -m app.recommendations
+
+Строит разреженную матрицу оценок пользователь × товар по активным отзывам,
+считает косинусное сходство товаров и сохраняет top-K соседей в product_similarities.
+"""
+import asyncio
+import os
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, delete, insert
+
+from app.database import async_session_maker, async_engine
+from app.models import Review as ReviewModel, Product as ProductModel, ProductSimilarity
+
+TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "10"))
+
+
+def compute_similarities(user_ids: np.ndarray, product_ids: np.ndarray, grades: np.ndarray,
+                         top_k: int = TOP_K) -> list[dict]:
+    """
+    Возвращает строки для product_similarities: top_k соседей каждого товара.
+    Оценки центрируются по среднему пользователя, чтобы «строгие» и «щедрые»
+    пользователи давали сопоставимый вклад.
+    """
+    if len(grades) == 0:
+        return []
+    users, user_idx = np.unique(user_ids, return_inverse=True)
+    products, product_idx = np.unique(product_ids, return_inverse=True)
+
+    grades = grades.astype(np.float64)
+    user_mean = np.bincount(user_idx, weights=grades) / np.bincount(user_idx)
+    centered = grades - user_mean[user_idx]
+
+    matrix = sparse.csc_matrix((centered, (user_idx, product_idx)), shape=(len(users), len(products)))
+    # Пользователь с одинаковыми оценками после центрирования не несёт сигнала
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1.0
+    matrix = matrix @ sparse.diags(1.0 / norms)
+
+    similarity = (matrix.T @ matrix).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    rows = []
+    for i in range(similarity.shape[0]):
+        start, end = similarity.indptr[i], similarity.indptr[i + 1]
+        scores = similarity.data[start:end]
+        neighbours = similarity.indices[start:end]
+        positive = scores > 0
+        scores, neighbours = scores[positive], neighbours[positive]
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+            scores, neighbours = scores[best], neighbours[best]
+        for j, score in zip(neighbours, scores):
+            rows.append({"product_id": int(products[i]),
+                         "similar_product_id": int(products[j]),
+                         "score": float(score)})
+    return rows
+
+
+async def build_recommendations() -> int:
+    """
+    Пересчитывает таблицу похожих товаров целиком в одной транзакции.
+    """
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(ReviewModel.user_id, ReviewModel.product_id, ReviewModel.grade)
+            .join(ProductModel, ProductModel.id == ReviewModel.product_id)
+            .where(ReviewModel.is_active, ProductModel.is_active)
+        )
+        data = np.array(result.all(), dtype=np.int64).reshape(-1, 3)
+        rows = await asyncio.to_thread(compute_similarities, data[:, 0], data[:, 1], data[:, 2])
+        await db.execute(delete(ProductSimilarity))
+        if rows:
+            await db.execute(insert(ProductSimilarity), rows)
+        await db.commit()
+    return len(rows)
+
+
+async def main() -> None:
+    count = await build_recommendations()
+    print(f"Сохранено пар похожих товаров: {count}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.auth import get_current_admin
+from app.models.users import User as UserModel
+from app import singleflight
+from app.profiling import sampler
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+
+@router.get("/metrics/coalescing")
+async def get_coalescing_metrics(admin: UserModel = Depends(get_current_admin)):
+    """
+    Возвращает счётчики объединения одинаковых запросов в этом воркере (только для admin).
+    """
+    return [group.stats() for group in singleflight.registry]
+
+
+@router.get("/profiling")
+async def get_profiling_summary(admin: UserModel = Depends(get_current_admin)):
+    """
+    Возвращает по каждому маршруту число профилированных запросов и снимков стека (только для admin).
+    """
+    return {route: {"requests": sampler.requests[route], "samples": sum(stacks.values())}
+            for route, stacks in sampler.routes.items()}
+
+
+@router.get("/profiling/stacks", response_class=PlainTextResponse)
+async def get_profiling_stacks(route: str = Query(description="Маршрут, например 'GET /products/{product_id}'"),
+                               admin: UserModel = Depends(get_current_admin)):
+    """
+    Возвращает стеки маршрута в свёрнутом формате для flamegraph.pl и speedscope (только для admin).
+    """
+    stacks = sampler.routes.get(route)
+    if stacks is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No samples for this route")
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+@router.delete("/profiling")
+async def reset_profiling(admin: UserModel = Depends(get_current_admin)):
+    """
+    Сбрасывает накопленные стеки (только для admin).
+    """
+    sampler.reset()
+    return {"message": "Profiling data reset"}
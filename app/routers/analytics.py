@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date, timedelta
+
+from app.models.analytics import ProductDailyStats as ProductDailyStatsModel
+from app.models.users import User as UserModel
+from app.schemas import ProductDailyStats
+from app.auth import get_current_seller
+from app.db_depends import get_async_db
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+
+@router.get("/seller", response_model=List[ProductDailyStats], status_code=status.HTTP_200_OK)
+async def get_seller_analytics(date_from: Optional[date] = Query(None, description="Начало периода (по умолчанию 30 дней назад)"),
+                               date_to: Optional[date] = Query(None, description="Конец периода включительно (по умолчанию сегодня)"),
+                               product_id: Optional[int] = Query(None, description="Только этот товар"),
+                               db: AsyncSession = Depends(get_async_db),
+                               current_user: UserModel = Depends(get_current_seller)):
+    """
+    Возвращает дневную статистику товаров текущего продавца: отзывы, средняя оценка и остаток (только для 'seller').
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=30)
+    stmt = select(ProductDailyStatsModel).where(ProductDailyStatsModel.seller_id == current_user.id,
+                                                ProductDailyStatsModel.day >= date_from,
+                                                ProductDailyStatsModel.day <= date_to)
+    if product_id is not None:
+        stmt = stmt.where(ProductDailyStatsModel.product_id == product_id)
+    stats = await db.scalars(stmt.order_by(ProductDailyStatsModel.day, ProductDailyStatsModel.product_id))
+    return [ProductDailyStats(product_id=row.product_id, day=row.day, review_count=row.review_count,
+                              avg_grade=row.grade_sum / row.review_count if row.review_count else None,
+                              stock=row.stock)
+            for row in stats.all()]
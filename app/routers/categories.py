@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
 from sqlalchemy.orm import Session
 
 from app.models.categories import Category as CategoryModel
-from app.schemas import Category as CategorySchema, CategoryCreate
+from app.models.category_stats import CategoryStats, recalculating_total_counts
+from app.models.change_events import add_change_event
+from app.schemas import Category as CategorySchema, CategoryCreate, CategoryWithStats
 from app.db_depends import get_db
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -25,6 +27,26 @@ async def get_all_categories(db: AsyncSession = Depends(get_async_db)):
     categories = result.all()
     return categories
 
+
+@router.get("/stats", response_model=list[CategoryWithStats])
+async def get_categories_with_stats(db: AsyncSession = Depends(get_async_db)):
+    """
+    Возвращает активные категории с количеством товаров, ценами и рейтингом.
+    """
+    result = await db.execute(
+        select(CategoryModel, CategoryStats)
+        .outerjoin(CategoryStats, CategoryStats.category_id == CategoryModel.id)
+        .where(CategoryModel.is_active == True)
+    )
+    categories = []
+    for category, stats in result.all():
+        item = CategorySchema.model_validate(category).model_dump()
+        if stats is not None:
+            item.update(product_count=stats.product_count, total_product_count=stats.total_product_count,
+                        min_price=stats.min_price, max_price=stats.max_price, avg_rating=stats.avg_rating)
+        categories.append(item)
+    return categories
+
 @router.post("/", response_model=CategorySchema, status_code=status.HTTP_201_CREATED)
 async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_async_db)):
     """
@@ -42,6 +64,10 @@ async def create_category(category: CategoryCreate, db: AsyncSession = Depends(g
     # Создание новой категории
     db_category = CategoryModel(**category.model_dump())
     db.add(db_category)
+    await db.flush()
+    db.add(CategoryStats(category_id=db_category.id))
+    await add_change_event(db, "category", db_category.id, "create",
+                           CategorySchema.model_validate(db_category).model_dump(mode="json"))
     await db.commit()
     await db.refresh(db_category)
     return db_category
@@ -72,12 +98,20 @@ async def update_category(category_id: int, category: CategoryCreate, db: AsyncS
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category cannot be its own parent")
 
     # Обновляем категорию
+    old_parent_id = db_category.parent_id
     update_data = category.model_dump(exclude_unset=True)
     await db.execute(
         update(CategoryModel)
         .where(CategoryModel.id == category_id)
         .values(**update_data)
     )
+    # При переносе категории пересчитываем счётчики старой и новой ветки
+    if "parent_id" in update_data and update_data["parent_id"] != old_parent_id:
+        await recalculating_total_counts(db, old_parent_id)
+        await recalculating_total_counts(db, update_data["parent_id"])
+    await db.refresh(db_category)
+    await add_change_event(db, "category", category_id, "update",
+                           CategorySchema.model_validate(db_category).model_dump(mode="json"))
     await db.commit()
     return db_category
 
@@ -96,7 +130,11 @@ async def delete_category(category_id: int, db: AsyncSession = Depends(get_async
     await db.execute(
         update(CategoryModel)
         .where(CategoryModel.id == category_id)
-        .values(is_active=False)
+        .values(is_active=False, deactivated_at=func.now())
     )
+    await recalculating_total_counts(db, db_category.parent_id)
+    await db.refresh(db_category)
+    await add_change_event(db, "category", category_id, "delete",
+                           CategorySchema.model_validate(db_category).model_dump(mode="json"))
     await db.commit()
     return db_category
\ No newline at end of file
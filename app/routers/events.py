@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from typing import List
+
+from app.models.change_events import ChangeEvent as ChangeEventModel
+from app.schemas import ChangeEvent as ChangeEventSchema
+from app.database import async_session_maker
+from app.config import EVENTS_MAX_WAIT, EVENTS_POLL_INTERVAL
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"],
+)
+
+# Как часто отправлять комментарий-пинг в SSE, чтобы прокси не закрывали простаивающее соединение
+KEEP_ALIVE_INTERVAL = 15
+
+
+async def fetch_events(after: int, limit: int) -> list[dict]:
+    """
+    Читает пачку событий с seq больше after.
+    Сессия открывается на один запрос, чтобы ожидание не держало соединение из пула.
+    """
+    async with async_session_maker() as db:
+        result = await db.scalars(
+            select(ChangeEventModel).where(ChangeEventModel.seq > after).order_by(ChangeEventModel.seq).limit(limit)
+        )
+        return [ChangeEventSchema.model_validate(event).model_dump(mode="json") for event in result.all()]
+
+
+@router.get("/", response_model=List[ChangeEventSchema], status_code=status.HTTP_200_OK)
+async def get_events(after: int = Query(0, ge=0, description="Вернуть события с seq больше этого"),
+                     limit: int = Query(100, ge=1, le=1000),
+                     wait: float = Query(0, ge=0, le=EVENTS_MAX_WAIT,
+                                         description="Сколько секунд ждать, если новых событий нет")):
+    """
+    Возвращает пачку событий изменений каталога (long-poll).
+    Следующий запрос делается с after = seq последнего полученного события.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        events = await fetch_events(after, limit)
+        if events or time.monotonic() >= deadline:
+            return events
+        await asyncio.sleep(EVENTS_POLL_INTERVAL)
+
+
+@router.get("/stream")
+async def stream_events(request: Request,
+                        after: int = Query(0, ge=0, description="Начать с событий с seq больше этого"),
+                        limit: int = Query(100, ge=1, le=1000)):
+    """
+    Поток событий изменений каталога в формате Server-Sent Events.
+    При переподключении продолжает с заголовка Last-Event-ID.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id is not None and last_event_id.isdigit():
+        after = int(last_event_id)
+
+    async def event_source():
+        offset = after
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            events = await fetch_events(offset, limit)
+            if events:
+                yield "".join(
+                    f"id: {event['seq']}\nevent: {event['entity']}.{event['action']}\n"
+                    f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+                    for event in events
+                )
+                offset = events[-1]["seq"]
+                last_sent = time.monotonic()
+                if len(events) == limit:
+                    continue
+            elif time.monotonic() - last_sent >= KEEP_ALIVE_INTERVAL:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(event_source(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
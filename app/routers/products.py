@@ -1,14 +1,24 @@
 from fastapi import APIRouter
-from fastapi import status, Depends
-from app.schemas import Product as ProductSchema, ProductCreate
-from app.models import Product as ProductModel, Category as CategoryModel
+from fastapi import status, Depends, Query, Response
+from app.schemas import Product as ProductSchema, ProductCreate, ProductChange as ProductChangeSchema
+from app.models import Product as ProductModel, Category as CategoryModel, ProductSimilarity, products_archive
+from app.models.products import ProductRow
+from app.models.category_stats import update_category_stats, product_state
+from app.models.product_changes import ProductChange, log_product_changes
+from app.models.change_events import add_change_event
 from sqlalchemy.orm import selectinload
 from app.db_depends import get_db
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func, tuple_
 from fastapi import HTTPException
-from typing import List
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
 from app.models.users import User as UserModel
 from app.auth import get_current_seller
+from app.config import RECOMMENDATIONS_CACHE_TTL, SINGLE_FLIGHT_MAX_IN_FLIGHT
+from app.singleflight import single_flight
+from app.database import async_session_maker
+import time
 
 from app.db_depends import get_async_db
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,6 +28,12 @@ router = APIRouter(
     tags=["products"],
 )
 
+# Кэш похожих товаров: product_id -> (момент устаревания, список товаров)
+similar_cache: dict[int, tuple[float, list[dict]]] = {}
+SIMILAR_CACHE_MAX_SIZE = 10_000
+
+product_flight = single_flight("get_product", SINGLE_FLIGHT_MAX_IN_FLIGHT)
+
 @router.post("/", response_model=ProductSchema, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductCreate,
@@ -34,17 +50,21 @@ async def create_product(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
     db_product = ProductModel(**product.model_dump(), seller_id=current_user.id)
     db.add(db_product)
-    await db.commit()
+    await db.flush()
+    await log_product_changes(db, [{"product_id": db_product.id, "change_type": "create",
+                                    "price": db_product.price, "stock": db_product.stock}])
+    await update_category_stats(db, None, product_state(db_product))
     await db.refresh(db_product)  # Для получения id и is_active из базы
+    await add_change_event(db, "product", db_product.id, "create",
+                           ProductSchema.model_validate(db_product).model_dump(mode="json"))
+    await db.commit()
     return db_product
 
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=List[ProductSchema])
 async def get_products(db: AsyncSession = Depends(get_async_db)) -> List[ProductSchema]:
-    stmt = select(ProductModel).where(ProductModel.is_active == True)
-    products = await db.scalars(stmt)
-    result = products.all()
-    return result
+    stmt = select(*ProductRow.columns).where(ProductModel.is_active == True)
+    return ProductRow.from_result(await db.execute(stmt))
 
 @router.get("category/{category_id}", status_code=status.HTTP_200_OK, response_model=List[ProductSchema])
 async def get_category_products(category_id: int, db: AsyncSession = Depends(get_async_db)) -> List[ProductSchema]:
@@ -52,22 +72,78 @@ async def get_category_products(category_id: int, db: AsyncSession = Depends(get
     category = await db.scalar(stmt)
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    stmt = select(ProductModel).where(ProductModel.category_id == category_id, ProductModel.is_active == True)
-    products = await db.scalars(stmt)
-    result = products.all()
-    return result
+    stmt = select(*ProductRow.columns).where(ProductModel.category_id == category_id, ProductModel.is_active == True)
+    return ProductRow.from_result(await db.execute(stmt))
 
 @router.get("/{product_id}", status_code=status.HTTP_200_OK, response_model=ProductSchema)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
-    stmt = select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True).options(selectinload(ProductModel.category))
-    temp = await db.scalars(stmt)
-    product = temp.first()
+async def get_product(product_id: int):
+    """
+    Возвращает активный товар. Одновременные запросы одного товара выполняют один запрос к БД.
+    """
+    async def load() -> bytes:
+        # Своя сессия: загрузка может пережить запрос, который её начал
+        async with async_session_maker() as db:
+            stmt = select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True).options(selectinload(ProductModel.category))
+            temp = await db.scalars(stmt)
+            product = temp.first()
+            if product is None:
+                raise HTTPException(status_code=404, detail="Product not found")
+            if product.category.is_active == False:
+                raise HTTPException(status_code=400, detail="Category not found")
+            return ProductSchema.model_validate(product).model_dump_json().encode()
+
+    return Response(content=await product_flight.do(product_id, load), media_type="application/json")
+    
+
+@router.get("/{product_id}/similar", status_code=status.HTTP_200_OK, response_model=List[ProductSchema])
+async def get_similar_products(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Возвращает товары, которые высоко оценили те же пользователи (рассчитываются офлайн).
+    """
+    cached = similar_cache.get(product_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    stmt = (
+        select(*ProductRow.columns)
+        .join(ProductSimilarity, ProductSimilarity.similar_product_id == ProductModel.id)
+        .where(ProductSimilarity.product_id == product_id, ProductModel.is_active == True)
+        .order_by(ProductSimilarity.score.desc())
+    )
+    products = ProductRow.from_result(await db.execute(stmt))
+    result = [ProductSchema.model_validate(product).model_dump() for product in products]
+    if len(similar_cache) >= SIMILAR_CACHE_MAX_SIZE:
+        similar_cache.clear()
+    similar_cache[product_id] = (time.monotonic() + RECOMMENDATIONS_CACHE_TTL, result)
+    return result
+
+
+@router.get("/{product_id}/price-history", status_code=status.HTTP_200_OK,
+            response_model=List[ProductChangeSchema])
+async def get_price_history(product_id: int,
+                            before: Optional[datetime] = Query(None, description="Вернуть изменения раньше этого момента"),
+                            before_id: Optional[int] = Query(None, description="id последней записи предыдущей страницы"),
+                            limit: int = Query(50, ge=1, le=500),
+                            db: AsyncSession = Depends(get_async_db)):
+    """
+    Возвращает историю цены и остатка товара от новых к старым.
+    Для следующей страницы передайте changed_at и id последней записи в before и before_id.
+    История доступна и для товаров, перенесённых в архив.
+    """
+    product = await db.scalar(select(ProductModel.id).where(ProductModel.id == product_id))
+    if product is None:
+        product = await db.scalar(select(products_archive.c.id).where(products_archive.c.id == product_id))
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    if product.category.is_active == False:
-        raise HTTPException(status_code=400, detail="Category not found")
-    return product
-    
+    stmt = select(ProductChange).where(ProductChange.product_id == product_id)
+    if before is not None and before_id is not None:
+        # У изменений из одной пачки одно changed_at, порядок внутри него задаёт id
+        stmt = stmt.where(tuple_(ProductChange.changed_at, ProductChange.id) < tuple_(before, before_id))
+    elif before is not None:
+        stmt = stmt.where(ProductChange.changed_at < before)
+    stmt = stmt.order_by(ProductChange.changed_at.desc(), ProductChange.id.desc()).limit(limit)
+    changes = await db.scalars(stmt)
+    return changes.all()
+
 
 @router.put("/{product_id}", response_model=ProductSchema)
 async def update_product(
@@ -90,11 +166,20 @@ async def update_product(
     )
     if not category_result.first():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
+    old_state = product_state(db_product)
+    if db_product.price != Decimal(str(product.price)) or db_product.stock != product.stock:
+        await log_product_changes(db, [{"product_id": product_id, "change_type": "update",
+                                        "price": product.price, "stock": product.stock}])
     await db.execute(
         update(ProductModel).where(ProductModel.id == product_id).values(**product.model_dump())
     )
-    await db.commit()
+    await update_category_stats(db, old_state,
+                                old_state._replace(category_id=product.category_id,
+                                                   price=Decimal(str(product.price))))
     await db.refresh(db_product)  # Для консистентности данных
+    await add_change_event(db, "product", product_id, "update",
+                           ProductSchema.model_validate(db_product).model_dump(mode="json"))
+    await db.commit()
     return db_product
 
 @router.delete("/{product_id}", response_model=ProductSchema)
@@ -114,9 +199,15 @@ async def delete_product(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or inactive")
     if product.seller_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only delete your own products")
+    old_state = product_state(product)
     await db.execute(
-        update(ProductModel).where(ProductModel.id == product_id).values(is_active=False)
+        update(ProductModel).where(ProductModel.id == product_id).values(is_active=False, deactivated_at=func.now())
     )
-    await db.commit()
+    await log_product_changes(db, [{"product_id": product_id, "change_type": "delete",
+                                    "price": product.price, "stock": product.stock}])
+    await update_category_stats(db, old_state, None)
     await db.refresh(product)  # Для возврата is_active = False
+    await add_change_event(db, "product", product_id, "delete",
+                           ProductSchema.model_validate(product).model_dump(mode="json"))
+    await db.commit()
     return product
\ No newline at end of file
@@ -1,39 +1,56 @@
-from fastapi import APIRouter, status, Depends, HTTPException
-from app.schemas import Review, ReviewCreate
-from app.models.reviews import Review as ReviewModel
+from fastapi import APIRouter, status, Depends, HTTPException, Response
+from pydantic import TypeAdapter
+from app.schemas import Review, ReviewCreate, Product as ProductSchema
+from app.models.reviews import Review as ReviewModel, ReviewRow
 from app.models.users import User as UserModel
 from app.models.products import Product as ProductModel
+from app.models.category_stats import update_category_stats, product_state
+from app.models.change_events import add_change_event
 from app.auth import get_current_buyer, get_current_admin
 from app.db_depends import get_async_db
+from app.database import dialect_insert, async_session_maker
+from app.config import SINGLE_FLIGHT_MAX_IN_FLIGHT
+from app.singleflight import single_flight
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import func
 from typing import List
+from datetime import datetime, timezone
 
 router = APIRouter(
     prefix="/reviews",
     tags=["reviews"]
 )
 
+reviews_adapter = TypeAdapter(List[Review])
+reviews_flight = single_flight("get_product_reviews", SINGLE_FLIGHT_MAX_IN_FLIGHT)
+
 @router.get("/", response_model=List[Review], status_code=status.HTTP_200_OK)
 async def get_reviews(db: AsyncSession = Depends(get_async_db)):
     """
     Возвращает список всех активных отзывов товаров
     """
-    temp = await db.scalars(select(ReviewModel).where(ReviewModel.is_active))
-    return temp.all()
+    return ReviewRow.from_result(await db.execute(select(*ReviewRow.columns).where(ReviewModel.is_active)))
 
 @router.get("/products/{product_id}/reviews", response_model=List[Review], status_code=status.HTTP_200_OK)
-async def get_product_reviews(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_product_reviews(product_id: int):
     """
-    Возвращает активные отзывы товара
+    Возвращает активные отзывы товара. Одновременные запросы одного товара выполняют один запрос к БД.
     """
-    product = await db.scalar(select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active))
-    if product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    temp = await db.scalars(select(ReviewModel).where(ReviewModel.product_id == product_id, ReviewModel.is_active))
-    return temp.all()
+    async def load() -> bytes:
+        # Своя сессия: загрузка может пережить запрос, который её начал
+        async with async_session_maker() as db:
+            product = await db.scalar(select(ProductModel.id).where(ProductModel.id == product_id, ProductModel.is_active))
+            if product is None:
+                raise HTTPException(status_code=404, detail="Product not found")
+            # Условие по product_id оставляет в плане одну секцию reviews
+            result = await db.execute(select(*ReviewRow.columns)
+                                      .where(ReviewModel.product_id == product_id, ReviewModel.is_active))
+            return reviews_adapter.dump_json(reviews_adapter.validate_python(ReviewRow.from_result(result),
+                                                                            from_attributes=True))
+
+    return Response(content=await reviews_flight.do(product_id, load), media_type="application/json")
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model = Review)
 async def create_review(review: ReviewCreate,
@@ -45,31 +62,53 @@ async def create_review(review: ReviewCreate,
     product = await db.scalar(select(ProductModel).where(ProductModel.id == review.product_id, ProductModel.is_active))
     if product is None:
         raise HTTPException(status_code = 404, detail="Product not found")
-    user_review = await db.scalar(select(ReviewModel).where(ReviewModel.user_id == user.id, ReviewModel.is_active))
-    if user_review:
+    # Вставка и проверка дубликата одним запросом по частичному уникальному индексу;
+    # индекс содержит product_id, поэтому проверка идёт внутри секции товара
+    stmt = (
+        dialect_insert(ReviewModel)
+        .values(user_id=user.id, **review.model_dump())
+        .on_conflict_do_nothing(index_elements=[ReviewModel.user_id, ReviewModel.product_id],
+                                index_where=ReviewModel.is_active)
+        .returning(ReviewModel)
+    )
+    review_db = await db.scalar(stmt)
+    if review_db is None:
+        await db.rollback()
         raise HTTPException(status_code=409, detail="You have already written a review")
-    review_db = ReviewModel(user_id = user.id, **review.model_dump())
-    db.add(review_db)
-    await db.flush()
+    old_state = product_state(product)
     await product.recalculating_rating(db)
-    await db.commit()    
-    await db.refresh(review_db)
+    await db.flush()
+    await update_category_stats(db, old_state, product_state(product))
+    await add_change_event(db, "review", review_db.id, "create", Review.model_validate(review_db).model_dump(mode="json"))
+    await add_change_event(db, "product", product.id, "update",
+                           ProductSchema.model_validate(product).model_dump(mode="json"))
+    await db.commit()
     return review_db
 
 @router.delete("/{review_id}", status_code=status.HTTP_200_OK)
 async def delete_review(review_id: int, 
+                        product_id: int | None = None,
                         db: AsyncSession = Depends(get_async_db), 
                         user: UserModel = Depends(get_current_admin)):
     """
-    Выполняет мягкое удаление отзыва по его id, устанавливая is_active = false (только для admin)
+    Выполняет мягкое удаление отзыва по его id, устанавливая is_active = false (только для admin).
+    С product_id отзыв ищется только в секции этого товара, без него — по индексу id во всех секциях
     """
-    review_db = await db.scalar(select(ReviewModel)
-                                .where(ReviewModel.id == review_id, ReviewModel.is_active)
-                                .options(selectinload(ReviewModel.product)))
+    stmt = select(ReviewModel).where(ReviewModel.id == review_id, ReviewModel.is_active)
+    if product_id is not None:
+        stmt = stmt.where(ReviewModel.product_id == product_id)
+    review_db = await db.scalar(stmt.options(selectinload(ReviewModel.product)))
     if review_db is None:
         raise HTTPException(status_code=404, detail="review not found")
     review_db.is_active = False
+    review_db.deactivated_at = datetime.now(timezone.utc)
     await db.flush()
+    old_state = product_state(review_db.product)
     await review_db.product.recalculating_rating(db)
+    await db.flush()
+    await update_category_stats(db, old_state, product_state(review_db.product))
+    await add_change_event(db, "review", review_id, "delete", Review.model_validate(review_db).model_dump(mode="json"))
+    await add_change_event(db, "product", review_db.product.id, "update",
+                           ProductSchema.model_validate(review_db.product).model_dump(mode="json"))
     await db.commit()
     return {"message": "Review deleted"}
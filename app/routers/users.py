@@ -6,10 +6,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.models.users import User as UserModel
 from app.schemas import UserCreate, User as UserSchema
 from app.db_depends import get_async_db
-from app.auth import hash_password, verify_password, create_access_token, create_refresh_token 
+from app.auth import (hash_password, verify_password, create_access_token, create_refresh_token,
+                      decode_token, token_type, revoke_refresh_token)
 
 import jwt
-from app.config import SECRET_KEY, ALGORITHM
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -58,6 +58,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
 async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async_db)):
     """
     Обновляет access_token с помощью refresh_token.
+    Использованный refresh_token отзывается, взамен выдаётся новый.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,9 +66,9 @@ async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(refresh_token)
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("jti") is None or token_type(payload) != "refresh":
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
@@ -75,5 +76,28 @@ async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async
     user = result.first()
     if user is None:
         raise credentials_exception
+    if not await revoke_refresh_token(db, payload):
+        raise credentials_exception
+    await db.commit()
     access_token = create_access_token(data={"sub": user.email, "role": user.role, "id": user.id})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    new_refresh_token = create_refresh_token(data={"sub": user.email, "role": user.role, "id": user.id})
+    return {"access_token": access_token, "refresh_token": new_refresh_token, "token_type": "bearer"}
+
+
+@router.post("/logout")
+async def logout(refresh_token: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Отзывает refresh_token, после чего им нельзя обновить access_token.
+    """
+    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                          detail="Could not validate refresh token",
+                                          headers={"WWW-Authenticate": "Bearer"})
+    try:
+        payload = decode_token(refresh_token)
+    except jwt.PyJWTError:
+        raise credentials_exception
+    if payload.get("jti") is None or token_type(payload) != "refresh":
+        raise credentials_exception
+    await revoke_refresh_token(db, payload)
+    await db.commit()
+    return {"message": "Logged out"}
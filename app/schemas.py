@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from datetime import datetime
+from datetime import datetime, date
 
 
 class CategoryCreate(BaseModel):
@@ -26,6 +26,18 @@ class Category(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CategoryWithStats(Category):
+    """
+    Модель для ответа с категорией и её предрассчитанной статистикой.
+    Используется в GET /categories/stats.
+    """
+    product_count: int = Field(0, description="Количество активных товаров в категории")
+    total_product_count: int = Field(0, description="Количество активных товаров вместе с подкатегориями")
+    min_price: Optional[float] = Field(None, description="Минимальная цена товара")
+    max_price: Optional[float] = Field(None, description="Максимальная цена товара")
+    avg_rating: float = Field(0.0, description="Средний рейтинг оценённых товаров")
+
+
 class ProductCreate(BaseModel):
     """
     Модель для создания и обновления товара.
@@ -58,6 +70,19 @@ class Product(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
     
+class ProductChange(BaseModel):
+    """
+    Модель для ответа с записью истории цены и остатка товара.
+    Используется в GET /products/{product_id}/price-history.
+    """
+    id: int = Field(description="Номер записи; вместе с changed_at задаёт порядок истории")
+    changed_at: datetime = Field(description="Дата и время изменения")
+    change_type: str = Field(description="Тип изменения: create, update или delete")
+    price: float = Field(description="Цена товара после изменения")
+    stock: int = Field(description="Количество товара на складе после изменения")
+
+    model_config = ConfigDict(from_attributes=True)
+
 class UserCreate(BaseModel):
     email: EmailStr = Field(description="Email пользователя")
     password: str = Field(min_length=8, description="Пароль (минимум 8 символов)")
@@ -92,4 +117,31 @@ class Review(BaseModel):
     grade: int = Field(ge=1, le=5, description="Оценка товара от 1 до 5")
     is_active: bool = Field(description="Активность отзыва")
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ChangeEvent(BaseModel):
+    """
+    Модель для ответа с событием изменения каталога
+    Используется в GET /events и GET /events/stream
+    """
+    seq: int = Field(description="Порядковый номер события")
+    entity: str = Field(description="Сущность: product, category или review")
+    entity_id: int = Field(description="ID изменённой сущности")
+    action: str = Field(description="Действие: create, update или delete")
+    payload: dict = Field(description="Состояние сущности после изменения")
+    created_at: datetime = Field(description="Дата и время события")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProductDailyStats(BaseModel):
+    """
+    Модель для ответа с дневной статистикой товара продавца
+    Используется в GET /analytics/seller
+    """
+    product_id: int = Field(description="ID товара")
+    day: date = Field(description="День")
+    review_count: int = Field(description="Количество отзывов, написанных за день")
+    avg_grade: Optional[float] = Field(None, description="Средняя оценка отзывов за день")
+    stock: Optional[int] = Field(None, description="Остаток на складе на момент последнего снимка за день")
@@ -0,0 +1,95 @@
+"""
+Точка входа для продакшн-запуска: python -m app.serve
+
+Поднимает несколько процессов uvicorn и делит между ними бюджет соединений с БД.
+Перезапуск без простоя — сигнал SIGHUP мастер-процессу: воркеры перезапускаются
+по одному, каждый сначала дорабатывает текущие запросы.
+
+Каждый воркер прогревается в lifespan до приёма запросов (WARMUP=true выставляется здесь,
+поэтому прогрев работает только при запуске через app.serve). Замер масштабирования
+по числу воркеров: python -m app.bench_serve.
+"""
+import asyncio
+import importlib.util
+import os
+import sys
+
+import uvicorn
+
+
+def get_workers_count() -> int:
+    """
+    Число воркеров: WEB_WORKERS или число доступных ядер.
+    """
+    workers = os.getenv("WEB_WORKERS")
+    if workers:
+        return max(1, int(workers))
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def get_connections_budget() -> int:
+    """
+    Соединения с БД, доступные воркерам: DB_MAX_CONNECTIONS без запаса
+    DB_RESERVED_CONNECTIONS для миграций и админки.
+    """
+    return int(os.getenv("DB_MAX_CONNECTIONS", "100")) - int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+
+
+def get_pool_size(workers: int, budget: int) -> int:
+    """
+    Размер пула соединений на воркер, чтобы все воркеры вместе не превысили бюджет.
+    """
+    return budget // workers
+
+
+async def prepare_sqlite() -> None:
+    """
+    Создаёт таблицы SQLite один раз до запуска воркеров, чтобы они не гонялись на create_all.
+    """
+    from app.database import async_engine, create_sqlite_tables
+    await create_sqlite_tables()
+    await async_engine.dispose()
+
+
+def main() -> None:
+    budget = get_connections_budget()
+    if budget < 1:
+        sys.exit("DB_MAX_CONNECTIONS должен быть больше DB_RESERVED_CONNECTIONS")
+    workers = get_workers_count()
+    if workers > budget:
+        # Каждому воркеру нужно хотя бы одно соединение
+        print(f"WEB_WORKERS={workers} больше бюджета соединений ({budget}), запускается {budget} воркеров",
+              file=sys.stderr)
+        workers = budget
+
+    # Воркеры запускаются через spawn и читают конфиг из окружения при импорте app.config
+    os.environ["DB_POOL_SIZE"] = str(get_pool_size(workers, budget))
+    os.environ["DB_MAX_OVERFLOW"] = "0"
+    os.environ.setdefault("DB_ECHO", "false")
+    os.environ["WARMUP"] = "true"
+
+    # Конфиг импортируется после настройки окружения: он читается один раз при импорте
+    from app.config import DB_BACKEND
+    if DB_BACKEND == "sqlite":
+        asyncio.run(prepare_sqlite())
+        os.environ["SQLITE_CREATE_TABLES"] = "false"
+
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        backlog=int(os.getenv("BACKLOG", "2048")),
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE", "5")),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        access_log=os.getenv("ACCESS_LOG", "false").lower() == "true",
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
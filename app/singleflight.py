@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые запросы внутри воркера: загрузку выполняет
+    только первый, остальные получают тот же результат (или ту же ошибку).
+    """
+
+    def __init__(self, name: str, max_in_flight: int):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.bypassed = 0
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        elif len(self._in_flight) >= self.max_in_flight:
+            # Карта заполнена — выполняем без объединения, чтобы не расти без границ
+            self.bypassed += 1
+            return await loader()
+        else:
+            # Отдельная задача: отмена первого запроса (клиент ушёл) не прерывает загрузку для остальных
+            task = asyncio.ensure_future(loader())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "coalescing_ratio": self.coalesced / self.calls if self.calls else 0.0,
+            "in_flight": len(self._in_flight),
+        }
+
+
+# Все экземпляры, чтобы отдавать метрики в одном месте
+registry: list[SingleFlight] = []
+
+
+def single_flight(name: str, max_in_flight: int) -> SingleFlight:
+    group = SingleFlight(name, max_in_flight)
+    registry.append(group)
+    return group
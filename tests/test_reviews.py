@@ -0,0 +1,65 @@
+"""
+Проверка create_review при одновременной отправке: запускается на SQLite (DB_BACKEND=sqlite).
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DB_ECHO"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-hs256-signing-0123")
+
+import httpx
+from sqlalchemy import select, func
+
+from app.main import app
+from app.database import async_session_maker
+from app.models import Review as ReviewModel
+
+CONCURRENT_REVIEWS = 10
+
+
+async def login(client: httpx.AsyncClient, email: str, role: str) -> dict:
+    await client.post("/users/", json={"email": email, "password": "12345678", "role": role})
+    response = await client.post("/users/token", data={"username": email, "password": "12345678"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def create_product(client: httpx.AsyncClient, seller: dict, category_id: int, name: str) -> int:
+    response = await client.post("/products/", headers=seller,
+                                 json={"name": name, "price": 100, "stock": 5, "category_id": category_id})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def run_concurrent_reviews() -> None:
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            seller = await login(client, "seller@example.com", "seller")
+            buyer = await login(client, "buyer@example.com", "buyer")
+            category_id = (await client.post("/categories/", json={"name": "Electronics"})).json()["id"]
+            product_id = await create_product(client, seller, category_id, "Phone")
+            other_product_id = await create_product(client, seller, category_id, "Laptop")
+
+            responses = await asyncio.gather(*[
+                client.post("/reviews/", headers=buyer, json={"product_id": product_id, "grade": 4})
+                for _ in range(CONCURRENT_REVIEWS)
+            ])
+            codes = sorted(response.status_code for response in responses)
+            assert codes == [201] + [409] * (CONCURRENT_REVIEWS - 1)
+
+            async with async_session_maker() as db:
+                active = await db.scalar(select(func.count(ReviewModel.id))
+                                         .where(ReviewModel.product_id == product_id, ReviewModel.is_active))
+            assert active == 1
+
+            # Ограничение действует на пару (пользователь, товар), а не на пользователя
+            response = await client.post("/reviews/", headers=buyer,
+                                         json={"product_id": other_product_id, "grade": 5})
+            assert response.status_code == 201
+
+
+def test_concurrent_reviews_create_one_active_review():
+    asyncio.run(run_concurrent_reviews())